@@ -0,0 +1,18 @@
+# Reload gunicorn with new code and no downtime: USR2 re-executes the master with the new
+# code, and once its workers are up the old master is stopped gracefully with QUIT.
+PIDFILE="${WEB_PIDFILE:-/tmp/gunicorn.pid}"
+
+OLD_PID=$(cat "$PIDFILE")
+kill -USR2 "$OLD_PID"
+
+for _ in $(seq 1 30); do
+  if [ -f "$PIDFILE.2" ] || { [ -f "$PIDFILE" ] && [ "$(cat "$PIDFILE")" != "$OLD_PID" ]; }; then
+    sleep 2
+    kill -QUIT "$OLD_PID"
+    exit 0
+  fi
+  sleep 1
+done
+
+echo "New master did not start, keeping $OLD_PID" >&2
+exit 1
@@ -1,6 +1,39 @@
 echo "$@"
 
-cd /app && PYTHONPATH=. python manage.py collectstatic
-cd /app && PYTHONPATH=. python manage.py migrate
-cd /app && PYTHONPATH=. python manage.py createsuperuser --noinput --username admin --email admin@yopmail.com
-cd /app && PYTHONPATH=. python manage.py runserver 0.0.0.0:"$1"
+# collectstatic, migrate and createsuperuser in one process, each skipped when there is
+# nothing to do (see app/startup.py).
+cd /app && PYTHONPATH=. python -m app.startup --superuser admin --email admin@yopmail.com
+
+PIDFILE="${WEB_PIDFILE:-/tmp/gunicorn.pid}"
+
+# Whether a gunicorn master is running. During a reload the old master's pid file is
+# renamed to .oldbin and the new master writes .2 until the old one has exited.
+master_alive() {
+  for file in "$PIDFILE" "$PIDFILE.2" "$PIDFILE.oldbin"; do
+    if [ -f "$file" ] && kill -0 "$(cat "$file")" 2>/dev/null; then
+      return 0
+    fi
+  done
+  return 1
+}
+
+# gunicorn is not exec'd: after a zero-downtime reload (docker/x-reload.sh) the old master
+# exits and the new one keeps serving, so this script stays in the foreground while any
+# master is running and passes TERM and INT on as a graceful shutdown.
+serve() {
+  rm -f "$PIDFILE" "$PIDFILE.2" "$PIDFILE.oldbin"
+  trap 'kill -TERM $(cat "$PIDFILE" "$PIDFILE.2" "$PIDFILE.oldbin" 2>/dev/null) 2>/dev/null' TERM INT
+  cd /app && PYTHONPATH=. PORT="$1" gunicorn -c python:app.gunicorn "$2" &
+  wait $!
+  while master_alive; do
+    sleep 1
+  done
+}
+
+# SERVER_MODE: "wsgi" or "asgi" run gunicorn (see app/gunicorn.py), anything else runs the
+# development server.
+case "$SERVER_MODE" in
+  wsgi) serve "$1" app.wsgi ;;
+  asgi) serve "$1" app.asgi ;;
+  *) cd /app && PYTHONPATH=. python manage.py runserver 0.0.0.0:"$1" ;;
+esac
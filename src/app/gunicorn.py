@@ -0,0 +1,50 @@
+"""Gunicorn settings for the production serving mode, see `docker/x-run.sh`.
+
+    WSGI: gunicorn -c python:app.gunicorn app.wsgi
+    ASGI: SERVER_MODE=asgi gunicorn -c python:app.gunicorn app.asgi
+
+Send HUP to the master to restart workers gracefully. With `preload_app` the code is loaded
+by the master, so new code needs a re-exec instead (`docker/x-reload.sh`).
+"""
+
+import os
+from multiprocessing import cpu_count
+from os import getenv
+
+bind = getenv("WEB_BIND", f"0.0.0.0:{getenv('PORT', '8099')}")
+workers = int(getenv("WEB_CONCURRENCY", str(cpu_count() * 2 + 1)))
+threads = int(getenv("WEB_THREADS", "4"))
+worker_class = (
+    "uvicorn.workers.UvicornWorker" if getenv("SERVER_MODE") == "asgi" else "gthread"
+)
+
+# Import the app once in the master so workers share its memory copy-on-write.
+preload_app = getenv("WEB_PRELOAD", "True") == "True"
+
+timeout = int(getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = int(getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(getenv("WEB_KEEPALIVE", "5"))
+max_requests = int(getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(getenv("WEB_MAX_REQUESTS_JITTER", "0"))
+
+pidfile = getenv("WEB_PIDFILE", "/tmp/gunicorn.pid")
+accesslog = getenv("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+# Request metrics shared by the workers, see `helpers.metrics`.
+metrics_dir = getenv("METRICS_DIR", "")
+
+
+def on_starting(server):
+    if metrics_dir:
+        from helpers.metrics import clear_directory
+
+        os.makedirs(metrics_dir, exist_ok=True)
+        clear_directory(metrics_dir)
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        from helpers.metrics import archive_process
+
+        archive_process(metrics_dir, worker.pid)
@@ -1,13 +1,32 @@
+from rest_framework import renderers
 from rest_framework.renderers import BaseRenderer
-from rest_framework.utils import json
 
-from helpers.responses import AppResponse
+from helpers.encoders import fast_json_dumps
+from helpers.metrics import timed
+from helpers.responses import AppResponse, render_envelope
 
 
 class ApiRenderer(BaseRenderer):
+    """Render data in the `AppResponse` envelope without building a response object."""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
         if isinstance(data, AppResponse):
             return data.content
 
-        return AppResponse(data).content
+        with timed("render"):
+            return render_envelope(data)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """DRF's JSON renderer encoding with `fast_json_dumps` unless an indent is asked for,
+    timed as "render" in the request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("render"):
+            if data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            return fast_json_dumps(data)
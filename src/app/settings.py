@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import sys
+from json import loads
 from os import getenv, path
 from pathlib import Path
+from tempfile import gettempdir
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,14 +45,17 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     # Third-party
     "rest_framework",
-    "drf_yasg",
+    "rest_framework.authtoken",
+    "django_filters",
     # Internal apps
     "task",
     "user",
 ]
 
 MIDDLEWARE = [
+    "helpers.middlewares.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     # "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,6 +63,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "helpers.middlewares.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "app.urls"
@@ -91,6 +98,18 @@ DATABASES = {
         "PASSWORD": getenv("POSTGRES_PASSWORD", "password"),
         "HOST": getenv("POSTGRES_HOST", "localhost"),
         "PORT": getenv("POSTGRES_PORT", "5432"),
+        # Keep connections open between requests; "None" keeps them open forever. Connections
+        # are checked before reuse, so a restarted database does not fail the next request.
+        # Async views open connections from executor threads that outlive the request, so
+        # ASGI closes them by default; use DB_POOL_SIZE there instead.
+        "CONN_MAX_AGE": (
+            None
+            if getenv("POSTGRES_CONN_MAX_AGE") == "None"
+            else int(
+                getenv("POSTGRES_CONN_MAX_AGE", "0" if getenv("SERVER_MODE") == "asgi" else "60")
+            )
+        ),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -149,12 +168,105 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "user.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "app.renderer.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 
 # Custom settings
 
+ENV = getenv("ENV", "local")
+
+# API documentation at /swagger/ and /redoc/, see app/swagger.py. Set API_DOCS_ENABLED=False
+# to leave out drf_yasg, whose import alone takes about 0.1 s in every process.
+API_DOCS_ENABLED = getenv("API_DOCS_ENABLED", "True") == "True"
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("django_filters"), "drf_yasg")
+
 SENTRY_DSN = getenv("SENTRY_DSN", "")
+SENTRY_APP_NAME = getenv("SENTRY_APP_NAME", "task-management-api")
+SENTRY_INTEGRATIONS = []
+SENTRY_SAMPLE_RATE = float(getenv("SENTRY_SAMPLE_RATE", "1.0"))
+SENTRY_TRACES_SAMPLE_RATE = float(getenv("SENTRY_TRACES_SAMPLE_RATE", "0.05"))
+# Import and initialize sentry_sdk when the first error is reported instead of at startup.
+# Starts faster, but without performance tracing.
+SENTRY_LAZY_INIT = getenv("SENTRY_LAZY_INIT", "") == "True"
+
+# Errors are reported from a background thread, see `helpers.reporting.ErrorReporter`.
+# Use "helpers.reporting.MemoryTransport" to keep reports in memory, or "" to disable reporting.
+ERROR_REPORT_TRANSPORT = getenv(
+    "ERROR_REPORT_TRANSPORT", "helpers.reporting.SentryTransport" if SENTRY_DSN else ""
+)
+ERROR_REPORT_QUEUE_SIZE = int(getenv("ERROR_REPORT_QUEUE_SIZE", "1000"))
+ERROR_REPORT_RATE_LIMIT = int(getenv("ERROR_REPORT_RATE_LIMIT", "10"))
+ERROR_REPORT_RATE_WINDOW = int(getenv("ERROR_REPORT_RATE_WINDOW", "60"))
+ERROR_REPORT_DEDUPE_WINDOW = int(getenv("ERROR_REPORT_DEDUPE_WINDOW", "60"))
+
+TASK_PAGE_SIZE = int(getenv("TASK_PAGE_SIZE", "100"))
+TASK_MAX_PAGE_SIZE = int(getenv("TASK_MAX_PAGE_SIZE", "1000"))
+
+TASK_BULK_MAX_ITEMS = int(getenv("TASK_BULK_MAX_ITEMS", "5000"))
+TASK_BULK_BATCH_SIZE = int(getenv("TASK_BULK_BATCH_SIZE", "500"))
+
+TASK_EXPORT_CHUNK_SIZE = int(getenv("TASK_EXPORT_CHUNK_SIZE", "2000"))
+
+# Per assignee and status task counts maintained on every write, see `task.models.TaskRollup`.
+# Run `manage.py rebuild_task_rollup` after enabling it.
+TASK_STATS_ROLLUP = getenv("TASK_STATS_ROLLUP", "") == "True"
+
+# Per-user cache of /api/v1/my-tasks responses, see `task.caches`. Disabled when empty;
+# use a cache shared by all workers (not the default LocMemCache) in production.
+MY_TASKS_CACHE_ALIAS = getenv("MY_TASKS_CACHE_ALIAS", "")
+MY_TASKS_CACHE_TTL = int(getenv("MY_TASKS_CACHE_TTL", "300"))
+
+# Request metrics, see `helpers.metrics`. /metrics/ serves them to staff users and to
+# `Authorization: Bearer <METRICS_TOKEN>`. Set METRICS_DIR to a directory shared by the
+# workers of a host (see app/gunicorn.py) so that every scrape covers all of them.
+METRICS_ENABLED = getenv("METRICS_ENABLED", "True") == "True"
+METRICS_SERVER_TIMING = getenv("METRICS_SERVER_TIMING", "True") == "True"
+METRICS_TOKEN = getenv("METRICS_TOKEN", "")
+METRICS_DIR = getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# N+1, slow query and query budget detection on top of the request metrics, see
+# `helpers.query_detector`. QUERY_DETECTOR_MODE is "off", "log" or "raise" ("raise" under
+# `manage.py test`); QUERY_BUDGETS is a JSON object such as {"EmployerTaskViewSet.list": 4}
+# overriding the `query_budgets` of the views.
+TESTING = sys.argv[1:2] == ["test"]
+QUERY_DETECTOR_MODE = getenv("QUERY_DETECTOR_MODE", "raise" if TESTING else "off")
+QUERY_DETECTOR_SAMPLE_RATE = float(getenv("QUERY_DETECTOR_SAMPLE_RATE", "0.01"))
+QUERY_DETECTOR_SLOW_MS = float(getenv("QUERY_DETECTOR_SLOW_MS", "100"))
+QUERY_DETECTOR_REPEAT_THRESHOLD = int(getenv("QUERY_DETECTOR_REPEAT_THRESHOLD", "3"))
+QUERY_BUDGETS = loads(getenv("QUERY_BUDGETS", "{}"))
+
+# Request profiles, see `helpers.profiling`. Superusers and employers profile a request by
+# sending `X-Profile: cprofile` (or `sample`) and download it from /profiles/<name>.
+# PROFILING_SAMPLE_RATE profiles that share of all requests with the sampling profiler.
+# Set PROFILING_DIR to a directory shared by the workers to download from any of them.
+PROFILING_ENABLED = getenv("PROFILING_ENABLED", "True") == "True"
+PROFILING_DIR = getenv("PROFILING_DIR", path.join(gettempdir(), "task-profiles"))
+PROFILING_MAX_FILES = int(getenv("PROFILING_MAX_FILES", "200"))
+PROFILING_SAMPLE_RATE = float(getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_SAMPLE_INTERVAL = float(getenv("PROFILING_SAMPLE_INTERVAL", "0.005"))
+PROFILING_PERMISSION_CLASS = "user.permissions.ProfilingPermission"
+
+# Token authentication cache, see `user.authentication.CachedTokenAuthentication`.
+# Set TOKEN_AUTH_CACHE_ALIAS to a name in CACHES to share entries between workers.
+TOKEN_AUTH_CACHE_SIZE = int(getenv("TOKEN_AUTH_CACHE_SIZE", "1024"))
+TOKEN_AUTH_CACHE_LOCAL_TTL = int(getenv("TOKEN_AUTH_CACHE_LOCAL_TTL", "30"))
+TOKEN_AUTH_CACHE_TTL = int(getenv("TOKEN_AUTH_CACHE_TTL", "300"))
+TOKEN_AUTH_CACHE_ALIAS = getenv("TOKEN_AUTH_CACHE_ALIAS", "")
+
+# Connection pool per worker process, see `helpers.postgresql_pool`. Disabled when 0. When
+# enabled, connections go back to the pool after every request instead of using CONN_MAX_AGE.
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", "0"))
+DB_POOL_TIMEOUT = float(getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_IDLE = int(getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_CHECK_AFTER = int(getenv("DB_POOL_CHECK_AFTER", "30"))
+if DB_POOL_SIZE:
+    DATABASES["default"].update(ENGINE="helpers.postgresql_pool", CONN_MAX_AGE=0)
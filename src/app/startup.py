@@ -0,0 +1,98 @@
+"""Container startup tasks, see `docker/x-run.sh`: collect the static files, apply the
+migrations and create the admin user, each skipped when there is nothing to do.
+
+    python -m app.startup --superuser admin --email admin@yopmail.com
+
+Running `collectstatic`, `migrate` and `createsuperuser` as three commands costs three
+Django starts, compares every static file, runs the post-migrate handlers and fails on the
+existing user at each restart. Here an up to date container costs one start, a walk of the
+static sources and a few queries.
+"""
+
+import argparse
+import hashlib
+import os
+
+FINGERPRINT_SUFFIX = ".fingerprint"
+
+
+def static_fingerprint():
+    """Hash of the path, size and modification time of every file `collectstatic` copies."""
+    from django.contrib.staticfiles.finders import get_finders
+
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n")
+    return hashlib.sha256("".join(sorted(entries)).encode()).hexdigest()
+
+
+def collect_static():
+    from django.conf import settings
+    from django.core.management import call_command
+
+    fingerprint_path = f"{settings.STATIC_ROOT}{FINGERPRINT_SUFFIX}"
+    fingerprint = static_fingerprint()
+    try:
+        with open(fingerprint_path) as file:
+            if file.read() == fingerprint and os.path.isdir(settings.STATIC_ROOT):
+                return "up to date"
+    except FileNotFoundError:
+        pass
+
+    call_command("collectstatic", interactive=False, verbosity=0)
+    with open(fingerprint_path, "w") as file:
+        file.write(fingerprint)
+    return "collected"
+
+
+def pending_migrations():
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def migrate():
+    from django.core.management import call_command
+
+    pending = pending_migrations()
+    if not pending:
+        return "up to date"
+    call_command("migrate", interactive=False, verbosity=0)
+    return f"applied {len(pending)} migrations"
+
+
+def create_superuser(username, email):
+    """Create the superuser `username`, with the DJANGO_SUPERUSER_PASSWORD password."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    if get_user_model().objects.filter(username=username).exists():
+        return "exists"
+    call_command(
+        "createsuperuser", interactive=False, username=username, email=email, verbosity=0
+    )
+    return "created"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--superuser", help="username of the superuser to create")
+    parser.add_argument("--email", default="")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    import django
+
+    django.setup()
+    print(f"collectstatic: {collect_static()}")
+    print(f"migrate: {migrate()}")
+    if args.superuser:
+        print(f"superuser {args.superuser}: {create_superuser(args.superuser, args.email)}")
+
+
+if __name__ == "__main__":
+    main()
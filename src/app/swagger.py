@@ -1,32 +1,49 @@
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
+"""API documentation routes. drf_yasg and the schema view are imported on the first request
+to them rather than by every worker at startup; `settings.API_DOCS_ENABLED` drops them."""
 
-from django.urls import path, re_path
+from functools import lru_cache
+
+from django.urls import path
 from rest_framework import permissions
 
-...
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Snippets API",
-        default_version="v1",
-        description="Test description",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@snippets.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+
+@lru_cache(maxsize=None)
+def get_view(ui=None):
+    """The drf_yasg schema view, or its "swagger" or "redoc" `ui`."""
+    from drf_yasg import openapi
+    from drf_yasg.views import get_schema_view
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            title="Snippets API",
+            default_version="v1",
+            description="Test description",
+            terms_of_service="https://www.google.com/policies/terms/",
+            contact=openapi.Contact(email="contact@snippets.local"),
+            license=openapi.License(name="BSD License"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+    if ui is None:
+        return schema_view.without_ui(cache_timeout=0)
+    return schema_view.with_ui(ui, cache_timeout=0)
+
+
+def schema(request, format):
+    return get_view()(request, format=format)
+
+
+def swagger_ui(request):
+    return get_view("swagger")(request)
+
+
+def redoc_ui(request):
+    return get_view("redoc")(request)
+
 
 urlpatterns = [
-    path(
-        "swagger<format>/", schema_view.without_ui(cache_timeout=0), name="schema-json"
-    ),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path("swagger<format>/", schema, name="schema-json"),
+    path("swagger/", swagger_ui, name="schema-swagger-ui"),
+    path("redoc/", redoc_ui, name="schema-redoc"),
 ]
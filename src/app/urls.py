@@ -15,19 +15,27 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from task.urls import async_urlpatterns as async_task_urlpatterns
 from task.urls import router as task_router
 from user.views import LoginAPIView
 from .swagger import urlpatterns as swagger_urlpatterns
+from .views import db_pool_stats, metrics, profile, profiles
 
 router = DefaultRouter()
 router.registry.extend(task_router.registry)
 
 urlpatterns = [
-    # path("login/", LoginAPIView.as_view(), name="login"),
+    path("api/v1/login/", LoginAPIView.as_view(), name="login"),
+    path("admin/db-pool/", db_pool_stats, name="db-pool-stats"),
+    path("metrics/", metrics, name="metrics"),
+    path("profiles/", profiles, name="profiles"),
+    path("profiles/<str:name>", profile, name="profile"),
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
-] + swagger_urlpatterns
+    path("api/", include(async_task_urlpatterns)),
+] + (swagger_urlpatterns if settings.API_DOCS_ENABLED else [])
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+
+from helpers.exceptions import ForbiddenException, NotFoundException
+from helpers.metrics import collect, render_prometheus
+from helpers.postgresql_pool.base import pool_stats
+from helpers.profiling import list_profiles, profile_path
+from helpers.responses import AppResponse
+from user.permissions import ProfilingPermission
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Connection pool stats of the worker process that serves the request."""
+    return JsonResponse({"pools": pool_stats()})
+
+
+def metrics(request):
+    """Request metrics of every worker of the host in the Prometheus text format."""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not (token and constant_time_compare(authorization, f"Bearer {token}")):
+        if not request.user.is_staff:
+            raise PermissionDenied
+
+    return HttpResponse(
+        render_prometheus(collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def check_profiling_permission(request):
+    # Checked here rather than in `permission_classes`, whose errors become 500 responses in
+    # `json_exception_handler`.
+    permission = ProfilingPermission()
+    if not permission.has_permission(request, None):
+        raise ForbiddenException(403002, permission.message)
+
+
+@api_view(["GET"])
+@permission_classes([])
+def profiles(request):
+    """Stored request profiles, newest first, see `helpers.profiling`."""
+    check_profiling_permission(request)
+    return AppResponse({"profiles": list_profiles()})
+
+
+@api_view(["GET"])
+@permission_classes([])
+def profile(request, name):
+    check_profiling_permission(request)
+    path = profile_path(name)
+    if path is None:
+        raise NotFoundException(404002, "Profile not found")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
@@ -0,0 +1,331 @@
+"""Latency, throughput and queries per request of the task API routes, with JSON baselines.
+
+Seeds a throwaway database with `manage.py seed_tasks` and sends the scenarios one after the
+other through the Django test client, or, with `--url`, drives a running server seeded with
+the same command from `--processes` load generator processes. Queries per request are read
+from the `Server-Timing` header of `helpers.middlewares.MetricsMiddleware`.
+
+`--save` writes the results with the current commit to a JSON file; `--compare` prints the
+change from such a file and exits with an error when a scenario got slower than
+`--tolerance` at p95 or runs more queries.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.api --tasks 10000 --save /tmp/before.json
+    cd src && PYTHONPATH=. python -m benchmarks.api --tasks 10000 --compare /tmp/before.json
+    cd src && python manage.py seed_tasks && PYTHONPATH=. python -m benchmarks.api \\
+        --url http://127.0.0.1:8099 --processes 8 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from urllib.parse import urlsplit
+
+from benchmarks.utils import percentile, print_table, setup_django, test_database
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def login(context, i):
+    data = {"username": context["employee"], "password": context["password"], "remember_me": 0}
+    return None, "POST", "/api/v1/login/", data
+
+
+def tasks_list(context, i):
+    return "employer", "GET", "/api/v1/tasks/", None
+
+
+def tasks_filtered(context, i):
+    return "employer", "GET", "/api/v1/tasks/?status=1&overdue=true&ordering=due_date", None
+
+
+def tasks_search(context, i):
+    return "employer", "GET", "/api/v1/tasks/?q=budget%20review", None
+
+
+def task_detail(context, i):
+    task_id = context["task_ids"][i % len(context["task_ids"])]
+    return "employer", "GET", f"/api/v1/tasks/{task_id}/", None
+
+
+def task_stats(context, i):
+    return "employer", "GET", "/api/v1/tasks/stats/", None
+
+
+def my_tasks(context, i):
+    return "employee", "GET", "/api/v1/my-tasks/", None
+
+
+def assign_task(context, i):
+    task_id = context["task_ids"][i % len(context["task_ids"])]
+    data = {"user": context["employee_id"]}
+    return "employer", "POST", f"/api/v1/tasks/{task_id}/assign-task/", data
+
+
+SCENARIOS = {
+    "login": login,
+    "tasks list": tasks_list,
+    "tasks filtered": tasks_filtered,
+    "tasks search": tasks_search,
+    "task detail": task_detail,
+    "task stats": task_stats,
+    "my tasks": my_tasks,
+    "assign task": assign_task,
+}
+
+
+class TestClientTransport:
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def request(self, method, path, token=None, data=None):
+        headers = {"Authorization": f"Token {token}"} if token else {}
+        body = json.dumps(data) if data is not None else ""
+        response = self.client.generic(
+            method, path, body, content_type="application/json", headers=headers
+        )
+        return response.status_code, response.headers.get("Server-Timing", ""), response.content
+
+
+class HTTPTransport:
+    """Requests over one keep-alive connection, reopened after errors."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def request(self, method, path, token=None, data=None):
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if token:
+            headers["Authorization"] = f"Token {token}"
+        body = json.dumps(data) if data is not None else None
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.getheader("Server-Timing", ""), response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            return 0, "", b""
+
+
+def send(transport, context, name, i):
+    """Send request `i` of scenario `name`: `(ms, queries or None, ok)`."""
+    role, method, path, data = SCENARIOS[name](context, i)
+    token = context["tokens"][role] if role else None
+    start = time.perf_counter()
+    status, server_timing, _ = transport.request(method, path, token, data)
+    elapsed = (time.perf_counter() - start) * 1000
+    match = QUERIES.search(server_timing)
+    return elapsed, int(match[1]) if match else None, 0 < status < 400
+
+
+def prepare(transport, employer, employee, password):
+    """Log the users in and pick the tasks and assignee the scenarios use."""
+    tokens = {}
+    for role, username in (("employer", employer), ("employee", employee)):
+        data = {"username": username, "password": password, "remember_me": 0}
+        status, _, body = transport.request("POST", "/api/v1/login/", data=data)
+        if status != 201:
+            raise RuntimeError(f"Could not log in as {username}: {status} {body[:200]!r}")
+        tokens[role] = json.loads(body)["data"]["token"]
+
+    _, _, body = transport.request("GET", "/api/v1/tasks/?page_size=100", tokens["employer"])
+    task_ids = [task["id"] for task in json.loads(body)["results"]]
+    _, _, body = transport.request("GET", "/api/v1/tasks/stats/", tokens["employer"])
+    employee_id = json.loads(body)["data"]["assignees"][0]["user"]
+    if not task_ids:
+        raise RuntimeError("No tasks to benchmark, run `manage.py seed_tasks` first.")
+    return {
+        "tokens": tokens,
+        "employee": employee,
+        "password": password,
+        "task_ids": task_ids,
+        "employee_id": employee_id,
+    }
+
+
+def summarize(timings, queries, errors, elapsed):
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        "p50": round(percentile(timings, 50), 2),
+        "p95": round(percentile(timings, 95), 2),
+        "p99": round(percentile(timings, 99), 2),
+        "queries": round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+def run_test_client(names, options):
+    from django.core.management import call_command
+
+    call_command(
+        "seed_tasks",
+        employees=options.employees,
+        tasks=options.tasks,
+        fanout=options.fanout,
+        prefix="bench",
+        stdout=sys.stderr,
+    )
+    transport = TestClientTransport()
+    context = prepare(transport, "bench-employer-0", "bench-employee-0", "password")
+
+    results = {}
+    for name in names:
+        for i in range(options.warmup):
+            send(transport, context, name, i)
+        timings, queries, errors = [], [], 0
+        start = time.perf_counter()
+        for i in range(options.repeat):
+            elapsed, count, ok = send(transport, context, name, i)
+            if not ok:
+                errors += 1
+                continue
+            timings.append(elapsed)
+            if count is not None:
+                queries.append(count)
+        results[name] = summarize(timings, queries, errors, time.perf_counter() - start)
+    return results
+
+
+def load_worker(args):
+    """Send scenario `name` for `duration` seconds from one process."""
+    url, context, name, duration, offset = args
+    transport = HTTPTransport(url)
+    timings, queries, errors = [], [], 0
+    deadline = time.monotonic() + duration
+    i = offset
+    while time.monotonic() < deadline:
+        elapsed, count, ok = send(transport, context, name, i)
+        i += 1
+        if not ok:
+            errors += 1
+            continue
+        timings.append(elapsed)
+        if count is not None:
+            queries.append(count)
+    return timings, queries, errors
+
+
+def run_load(names, options):
+    context = prepare(HTTPTransport(options.url), options.employer, options.employee, "password")
+    processes, duration = options.processes, options.duration
+
+    results = {}
+    with Pool(processes) as pool:
+        for name in names:
+            jobs = [(options.url, context, name, duration, n * 1000) for n in range(processes)]
+            start = time.perf_counter()
+            parts = pool.map(load_worker, jobs)
+            elapsed = time.perf_counter() - start
+            results[name] = summarize(
+                [timing for timings, _, _ in parts for timing in timings],
+                [count for _, queries, _ in parts for count in queries],
+                sum(errors for _, _, errors in parts),
+                elapsed,
+            )
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_results(results):
+    rows = [
+        [name, r["requests"], r["errors"], r["rps"], r["p50"], r["p95"], r["p99"], r["queries"]]
+        for name, r in results.items()
+    ]
+    headers = ["scenario", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "queries"]
+    print_table(headers, rows)
+
+
+def compare(results, baseline, tolerance):
+    """Print the change from `baseline` and return the names of the regressed scenarios."""
+    rows, regressed = [], []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = (result["p95"] - before["p95"]) / before["p95"] if before["p95"] else 0.0
+        more_queries = (result["queries"] or 0) > (before["queries"] or 0)
+        if change > tolerance or more_queries:
+            regressed.append(name)
+        rows.append(
+            [
+                name,
+                before["p95"],
+                result["p95"],
+                f"{change:+.0%}",
+                f"{before['queries']} -> {result['queries']}",
+                "REGRESSED" if name in regressed else "",
+            ]
+        )
+
+    print(f"\nCompared with {baseline['commit'] or 'unknown commit'} ({baseline['created']}):")
+    print_table(["scenario", "before p95", "p95", "change", "queries", ""], rows)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--url", help="benchmark a running server instead of the test client")
+    parser.add_argument("--employer", default="bench-employer-0", help="with --url")
+    parser.add_argument("--employee", default="bench-employee-0", help="with --url")
+    parser.add_argument("--processes", type=int, default=4, help="with --url")
+    parser.add_argument("--duration", type=float, default=10, help="per scenario, with --url")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results saved in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown")
+    args = parser.parse_args()
+
+    if args.url:
+        results = run_load(args.scenarios, args)
+    else:
+        setup_django()
+        with test_database():
+            results = run_test_client(args.scenarios, args)
+    print_results(results)
+
+    config = {
+        key: getattr(args, key)
+        for key in ("url", "employees", "tasks", "fanout", "repeat", "processes", "duration")
+    }
+    created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    if args.save:
+        with open(args.save, "w") as file:
+            data = {"commit": current_commit(), "created": created, "config": config}
+            json.dump({**data, "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["config"] != config:
+            print(f"\nWarning: the baseline was run with {baseline['config']}.")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Throughput of the sync employer task viewset against the async views under ASGI.
+
+Starts gunicorn with uvicorn workers against the configured database and, for every
+`--concurrency` value, drives the same list and retrieve requests at the sync
+(`/api/v1/tasks/`) and async (`/api/v1/async/tasks/`) paths. Pass an employer token.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.async_views --token <token> --task 1
+"""
+
+import argparse
+import signal
+from multiprocessing import Pool
+
+from benchmarks.serving import client, serve, wait_until_ready
+from benchmarks.utils import percentile, print_table
+
+
+def run(token, task_id, workers, concurrencies, duration, port):
+    paths = [("list", "tasks/"), ("retrieve", f"tasks/{task_id}/")]
+    rows = []
+    server = serve(workers, 1, "asgi", port)
+    try:
+        wait_until_ready(port)
+        for concurrency in concurrencies:
+            for name, path in paths:
+                for mode, prefix in [("sync", "/api/v1/"), ("async", "/api/v1/async/")]:
+                    args = [(port, prefix + path, token, duration)] * concurrency
+                    with Pool(concurrency) as pool:
+                        results = pool.map(client, args)
+                    timings = [timing for result, _ in results for timing in result]
+                    rows.append(
+                        [
+                            concurrency,
+                            name,
+                            mode,
+                            f"{len(timings) / duration:.0f}",
+                            f"{percentile(timings, 50):.1f}",
+                            f"{percentile(timings, 95):.1f}",
+                            sum(errors for _, errors in results),
+                        ]
+                    )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    print_table(
+        ["connections", "endpoint", "view", "req/s", "p50 ms", "p95 ms", "errors"], rows
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--task", type=int, required=True, help="id of the task to retrieve")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8199)
+    args = parser.parse_args()
+
+    run(args.token, args.task, args.workers, args.concurrency, args.duration, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Raise + respond cost of 4xx and 5xx `AppException`s through the DRF exception handler.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.exceptions --repeat 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.utils import percentile, print_table, setup_django
+
+
+def raise_and_respond(exc_class, request, handler):
+    try:
+        try:
+            int("not a number")
+        except ValueError as error:
+            raise exc_class(400001, "Invalid value", error=error, request=request)
+    except Exception as exc:
+        return handler(exc, {"request": request}).content
+
+
+def run(repeat):
+    from django.test import RequestFactory, override_settings
+    from rest_framework.request import Request
+
+    from helpers import reporting
+    from helpers.exception_handlers import json_exception_handler
+    from helpers.exceptions import BadRequestException, ServerErrorException
+
+    request = Request(RequestFactory().get("/api/v1/tasks/", {"status": "x"}))
+    scenarios = [
+        ("4xx", BadRequestException, False),
+        ("5xx", ServerErrorException, False),
+        ("5xx + reporting", ServerErrorException, True),
+        ("4xx DEBUG", BadRequestException, "debug"),
+        ("5xx DEBUG", ServerErrorException, "debug"),
+    ]
+
+    rows = []
+    for name, exc_class, mode in scenarios:
+        reporter = reporting.ErrorReporter(reporting.MemoryTransport()) if mode is True else None
+        with override_settings(DEBUG=mode == "debug"):
+            reporting._reporter = reporter
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                raise_and_respond(exc_class, request, json_exception_handler)
+                timings.append((time.perf_counter() - start) * 1_000_000)
+            if reporter is not None:
+                reporter.flush()
+            reporting._reporter = None
+
+        rows.append(
+            [
+                name,
+                f"{percentile(timings, 50):.1f}",
+                f"{percentile(timings, 95):.1f}",
+                f"{percentile(timings, 99):.1f}",
+            ]
+        )
+
+    print_table(["scenario", "p50 us", "p95 us", "p99 us"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
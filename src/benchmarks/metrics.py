@@ -0,0 +1,83 @@
+"""Per-request overhead of `MetricsMiddleware`, and per-query overhead of its query wrapper.
+
+The middleware wraps a view that returns a small response right away, so the numbers are the
+cost added to every request; the query wrapper is timed around a no-op `execute`.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.metrics --repeat 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.utils import percentile, print_table, setup_django
+
+
+def timings(func, repeat):
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.append((time.perf_counter() - start) * 1_000_000)
+    return result
+
+
+def summary(result):
+    return [f"{percentile(result, pct):.2f}" for pct in (50, 95, 99)]
+
+
+def run(repeat):
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.urls import resolve
+
+    from helpers.metrics import RequestMetrics, current, record_query, registry
+    from helpers.middlewares import MetricsMiddleware
+
+    request = RequestFactory().get("/api/v1/tasks/")
+    request.resolver_match = resolve("/api/v1/tasks/")
+    response = HttpResponse(b'{"results": []}', content_type="application/json")
+
+    def view(request):
+        return response
+
+    def execute(sql, params, many, context):
+        return None
+
+    def wrapped_query():
+        record_query(execute, "SELECT 1", (), False, {})
+
+    middleware = MetricsMiddleware(view)
+    scenarios = [
+        ("request without middleware", lambda: view(request), {}),
+        ("request with middleware", lambda: middleware(request), {"METRICS_SERVER_TIMING": False}),
+        ("+ Server-Timing header", lambda: middleware(request), {"METRICS_SERVER_TIMING": True}),
+        ("query outside a request", wrapped_query, {}),
+    ]
+
+    rows = []
+    for name, func, settings in scenarios:
+        with override_settings(**settings):
+            rows.append([name, *summary(timings(func, repeat))])
+    registry.reset()
+
+    token = current.set(RequestMetrics())
+    try:
+        rows.append(["query in a request", *summary(timings(wrapped_query, repeat))])
+    finally:
+        current.reset(token)
+
+    print_table(["scenario", "p50 us", "p95 us", "p99 us"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
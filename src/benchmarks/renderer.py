@@ -0,0 +1,87 @@
+"""Render cost of large task lists: `JsonResponse` vs `ApiRenderer` with and without orjson.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.renderer --sizes 1000 10000 100000
+"""
+
+import argparse
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.utils import measure, print_table, setup_django
+
+
+def task_list(count):
+    """Data shaped like `TaskDetailSerializer(many=True).data`."""
+    from django.utils import timezone
+
+    now = timezone.now()
+    return [
+        {
+            "id": i,
+            "title": f"Task {i}",
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "status": 1 + i % 2,
+            "users": [
+                {"user": {"id": i % 50 + j, "username": f"employee-{i % 50 + j}", "role": "E"}}
+                for j in range(3)
+            ],
+            "due_date": (now + timedelta(hours=i)).isoformat(),
+            "_created": now.isoformat(),
+            "_updated": now.isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def run(sizes, repeat):
+    from app.renderer import ApiRenderer
+    from helpers.required_libs import orjson
+    from helpers.responses import CustomJsonResponse
+
+    renderer = ApiRenderer()
+
+    def render_stdlib(data):
+        with mock.patch("helpers.encoders.orjson", None):
+            return renderer.render(data)
+
+    candidates = [
+        ("JsonResponse", lambda data: CustomJsonResponse(data).content),
+        ("ApiRenderer (stdlib)", render_stdlib),
+    ]
+    if orjson is not None:
+        candidates.append(("ApiRenderer (orjson)", renderer.render))
+
+    rows = []
+    for size in sizes:
+        data = task_list(size)
+        baseline = None
+        for name, render in candidates:
+            timings = measure(lambda: render(data), repeat=repeat, warmup=1)
+            baseline = baseline or timings["p50"]
+            rows.append(
+                [
+                    size,
+                    name,
+                    f"{timings['p50']:.2f}",
+                    f"{timings['p95']:.2f}",
+                    f"{baseline / timings['p50']:.1f}x",
+                    len(render(data)),
+                ]
+            )
+
+    print_table(["tasks", "renderer", "p50 ms", "p95 ms", "speedup", "bytes"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Cost of serializing task lists with `TaskDetailSerializer` and `FastTaskListSerializer`.
+
+Both read the tasks and their assignees from the database and build the list payload; the
+time includes the queries. Sizes are list lengths, not pages.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.serializers --sizes 1000 10000 100000
+"""
+
+import argparse
+
+from benchmarks.task_indexes import seed_tasks
+from benchmarks.utils import analyze, measure, print_table, setup_django, test_database
+
+
+def run(sizes, repeat):
+    from task.models import Tasks
+    from task.serializers import FastTaskListSerializer, TaskDetailSerializer
+    from user.models import Users
+
+    users = [Users.objects.create_user(username=f"employee-{i}") for i in range(50)]
+
+    rows, seeded = [], 0
+    for size in sorted(sizes):
+        seed_tasks(size - seeded, users, start=seeded)
+        seeded = size
+        analyze("task", "user_task")
+        queryset = Tasks.objects.order_by("id")[:size]
+
+        def drf():
+            return TaskDetailSerializer(queryset.with_assignees(), many=True).data
+
+        def fast():
+            serializer = FastTaskListSerializer()
+            return serializer.to_representation(list(serializer.values(queryset)))
+
+        runs = max(1, repeat * 1000 // size)
+        timings = {"drf": measure(drf, runs, warmup=1), "fast": measure(fast, runs, warmup=1)}
+        rows.append(
+            [
+                size,
+                f"{timings['drf']['p50']:.1f}",
+                f"{timings['fast']['p50']:.1f}",
+                f"{timings['drf']['p50'] / timings['fast']['p50']:.1f}x",
+            ]
+        )
+
+    print_table(["tasks", "TaskDetailSerializer ms", "FastTaskListSerializer ms", "speedup"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=10, help="runs at 1000 tasks, fewer above")
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Throughput and latency of the task list endpoints served by gunicorn per worker count.
+
+Starts `gunicorn -c python:app.gunicorn` for every `--workers` value against the configured
+database and drives it with keep-alive HTTP clients. Pass the token of a user with data,
+e.g. the employer from `docker-compose up`.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.serving --token <token> --workers 1 2 4 8
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+from benchmarks.utils import percentile, print_table
+
+HOST = "127.0.0.1"
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=1)
+            connection.request("GET", "/admin/login/")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start on port {port}")
+
+
+def client(args):
+    """Send requests over one persistent connection and return the latencies in ms."""
+    port, path, token, duration = args
+    headers = {"Authorization": f"Token {token}", "Connection": "keep-alive"}
+    connection = http.client.HTTPConnection(HOST, port, timeout=30)
+    timings, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, port, timeout=30)
+            continue
+        timings.append((time.perf_counter() - start) * 1000)
+    connection.close()
+    return timings, errors
+
+
+def serve(workers, threads, mode, port):
+    env = dict(
+        os.environ,
+        WEB_BIND=f"{HOST}:{port}",
+        WEB_CONCURRENCY=str(workers),
+        WEB_THREADS=str(threads),
+        WEB_PIDFILE=f"/tmp/gunicorn-bench-{port}.pid",
+        WEB_ACCESS_LOG="",
+        SERVER_MODE=mode,
+        DEBUG="False",
+    )
+    app = "app.asgi" if mode == "asgi" else "app.wsgi"
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "python:app.gunicorn", app],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def run(token, worker_counts, threads, mode, paths, concurrency, duration, port):
+    rows = []
+    for workers in worker_counts:
+        server = serve(workers, threads, mode, port)
+        try:
+            wait_until_ready(port)
+            for path in paths:
+                with Pool(concurrency) as pool:
+                    results = pool.map(client, [(port, path, token, duration)] * concurrency)
+                timings = [timing for result, _ in results for timing in result]
+                errors = sum(error for _, error in results)
+                rows.append(
+                    [
+                        workers,
+                        path,
+                        f"{len(timings) / duration:.0f}",
+                        f"{percentile(timings, 50):.1f}",
+                        f"{percentile(timings, 95):.1f}",
+                        errors,
+                    ]
+                )
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+    print_table(["workers", "path", "req/s", "p50 ms", "p95 ms", "errors"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--paths", nargs="+", default=["/api/v1/tasks/", "/api/v1/my-tasks/"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8199)
+    args = parser.parse_args()
+
+    run(
+        args.token,
+        args.workers,
+        args.threads,
+        args.mode,
+        args.paths,
+        args.concurrency,
+        args.duration,
+        args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
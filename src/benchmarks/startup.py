@@ -0,0 +1,108 @@
+"""Worker startup cost: import time by package and time to the first response.
+
+Every run is a fresh `python` process that loads the WSGI application, resolves the URL
+configuration and serves one request to `--path`, the work a new gunicorn worker does
+without `preload_app`. The default configuration is compared with the fast start settings
+(`API_DOCS_ENABLED=False`, `SENTRY_LAZY_INIT=True`); `--env` adds settings to both. The
+`python -X importtime` breakdown is of the default configuration.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.startup --repeat 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.utils import print_table
+
+CHILD = """
+import json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+
+application = get_wsgi_application()
+get_resolver().url_patterns
+loaded = time.perf_counter()
+
+environ = {"PATH_INFO": sys.argv[1]}
+setup_testing_defaults(environ)
+statuses = []
+b"".join(application(environ, lambda status, headers: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({"load": loaded - start, "request": done - loaded, "status": statuses[0]}))
+"""
+
+CONFIGURATIONS = [
+    ("default", {}),
+    ("fast start", {"API_DOCS_ENABLED": "False", "SENTRY_LAZY_INIT": "True"}),
+]
+
+
+def run_child(path, env, importtime=False):
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", CHILD, path]
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_breakdown(stderr):
+    """Cumulative import time in ms of the top-level packages imported, from `-X importtime`."""
+    totals = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # The header line.
+        # Nested imports are indented and already counted in their parent.
+        if not name.startswith("  ", 1):
+            totals[name.strip().split(".")[0]] += int(cumulative) / 1000
+    return totals
+
+
+def run(path, repeat, extra_env, top):
+    rows = []
+    for name, settings in CONFIGURATIONS:
+        env = dict(os.environ, **extra_env, **settings)
+        runs = [run_child(path, env) for _ in range(repeat)]
+        rows.append(
+            [
+                name,
+                f"{statistics.median(elapsed for elapsed, _, _ in runs) * 1000:.0f}",
+                f"{statistics.median(result['load'] for _, result, _ in runs) * 1000:.0f}",
+                f"{statistics.median(result['request'] for _, result, _ in runs) * 1000:.0f}",
+                runs[0][1]["status"],
+            ]
+        )
+    print_table(["configuration", "process ms", "load ms", "first request ms", "status"], rows)
+
+    _, _, stderr = run_child(path, dict(os.environ, **extra_env), importtime=True)
+    totals = import_breakdown(stderr)
+    print(f"\nImport time by package, default configuration (total {sum(totals.values()):.0f} ms):")
+    print_table(["package", "ms"], [[name, f"{ms:.1f}"] for name, ms in totals.most_common(top)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/admin/login/", help="served without the database")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="packages in the import breakdown")
+    parser.add_argument("--env", nargs="*", default=[], metavar="NAME=VALUE")
+    args = parser.parse_args()
+
+    run(args.path, args.repeat, dict(item.split("=", 1) for item in args.env), args.top)
+
+
+if __name__ == "__main__":
+    main()
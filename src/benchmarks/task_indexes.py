@@ -0,0 +1,111 @@
+"""List latency against table size, with and without the task list indexes.
+
+The task list indexes (`Tasks.Meta.indexes`) and the `user_task_unique`
+constraint are dropped for the "before" run and restored for the "after" run.
+
+Usage:
+    cd src && PYTHONPATH=. python -m benchmarks.task_indexes --sizes 1000 10000 100000
+"""
+
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks.utils import analyze, measure, print_table, setup_django, test_database
+
+SCENARIOS = [
+    ("open by due date", {"status": 1, "ordering": "due_date"}),
+    ("completed by newest", {"status": 2, "ordering": "-_created"}),
+    ("all by due date desc", {"ordering": "-due_date"}),
+    ("assignee by newest", {"assignee": None, "ordering": "-_created"}),
+]
+
+
+def seed_tasks(count, users, start=0, batch_size=5000):
+    from django.utils import timezone
+
+    from task.models import Tasks
+    from user.models import UserTasks
+
+    now = timezone.now()
+
+    def due_date():
+        return None if random.random() < 0.1 else now + timedelta(hours=random.randint(0, 5000))
+
+    for offset in range(start, start + count, batch_size):
+        size = min(batch_size, start + count - offset)
+        tasks = Tasks.objects.bulk_create(
+            Tasks(
+                title=f"Task {offset + i}",
+                status=random.choice([1, 2]),
+                due_date=due_date(),
+            )
+            for i in range(size)
+        )
+        UserTasks.objects.bulk_create(UserTasks(user=random.choice(users), task=t) for t in tasks)
+
+
+def set_indexes(enabled):
+    from django.db import connection
+
+    from task.models import Tasks
+    from user.models import UserTasks
+
+    with connection.schema_editor() as editor:
+        for index in Tasks._meta.indexes:
+            (editor.add_index if enabled else editor.remove_index)(Tasks, index)
+        for constraint in UserTasks._meta.constraints:
+            (editor.add_constraint if enabled else editor.remove_constraint)(UserTasks, constraint)
+
+
+def run(sizes, repeat):
+    from rest_framework.test import APIClient
+
+    from user.enums import UserRole
+    from user.models import Users
+
+    employer = Users.objects.create_user(username="employer", role=UserRole.EMPLOYER.value)
+    users = [Users.objects.create_user(username=f"employee-{i}") for i in range(50)]
+    client = APIClient()
+    client.force_authenticate(employer)
+
+    rows, seeded = [], 0
+    for size in sorted(sizes):
+        seed_tasks(size - seeded, users, start=seeded)
+        seeded = size
+        analyze("task", "user_task")
+
+        for name, params in SCENARIOS:
+            params = {**params, "page_size": 100}
+            if "assignee" in params:
+                params["assignee"] = users[0].id
+
+            timings = {}
+            for enabled in (False, True):
+                set_indexes(enabled)
+                analyze("task", "user_task")
+                timings[enabled] = measure(
+                    lambda: client.get("/api/v1/tasks/", params), repeat=repeat
+                )
+
+            before, after = timings[False]["p50"], timings[True]["p50"]
+            rows.append(
+                [size, name, f"{before:.2f}", f"{after:.2f}", f"{before / max(after, 1e-9):.1f}x"]
+            )
+
+    print_table(["tasks", "scenario", "before p50 ms", "after p50 ms", "speedup"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
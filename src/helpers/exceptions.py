@@ -4,26 +4,12 @@ from django.conf import settings
 from django.http import HttpRequest
 
 from .encoders import custom_json_dumps
+from .reporting import get_reporter, init_sentry
 from .required_libs import Request
-from .responses import AppResponse
-
-_is_sentry_active = False
-if settings.SENTRY_DSN:
-    import sentry_sdk
-
-    sentry_sdk.init(
-        dsn=settings.SENTRY_DSN,
-        integrations=settings.SENTRY_INTEGRATIONS,
-        # Set traces_sample_rate to 1.0 to capture 100%
-        # of transactions for performance monitoring.
-        # We recommend adjusting this value in production.
-        traces_sample_rate=1.0,
-        # If you wish to associate users to errors (assuming you are using
-        # django.contrib.auth) you may enable sending PII data.
-        send_default_pii=True,
-    )
-    _is_sentry_active = True
-    print("Sentry initiated by darasdk")
+from .responses import AppResponse, render_envelope
+
+if settings.SENTRY_DSN and not settings.SENTRY_LAZY_INIT:
+    init_sentry()
 
 
 class AppException(Exception):
@@ -77,17 +63,15 @@ class AppException(Exception):
         self.err_html = err_html if err_html is not None else err_message
         self.should_notify = notify
         self._error = error
-        self._err_info: dict = (
-            err_info
-            if isinstance(err_info, dict)
-            else ({"info": err_info} if err_info is not None else {})
-        )
+        # Normalized by the `err_info` property, the trace is only collected when it is read.
+        self._err_info = err_info
         self._notified = False
 
         if error is not None:
             self.with_traceback(error.__traceback__)
 
     def log_trace_to_err_info(self):
+        self._normalize_err_info()
         if "trace" in self._err_info:
             return
 
@@ -121,24 +105,35 @@ class AppException(Exception):
             self.notify_error()
 
     def notify_sentry(self):
-        if not _is_sentry_active:
-            return
-
-        sentry_sdk.set_tag("env", settings.ENV)
-        sentry_sdk.set_tag("app", settings.SENTRY_APP_NAME)
-        sentry_sdk.set_tag("err_code", self.errcode)
-        sentry_sdk.set_tag("message", self.message)
-        sentry_sdk.set_tag("err_message", self.err_message)
-        sentry_sdk.set_tag("err_class", self.__class__.__name__)
-        sentry_sdk.set_extra("request_data", self.request_data_str)
-        sentry_sdk.set_extra("data", self.data_str)
-        sentry_sdk.set_extra("error_info", custom_json_dumps(self.err_info))
-        sentry_sdk.set_extra("error_data", custom_json_dumps(self.err_data))
-        sentry_sdk.set_extra("response_data", custom_json_dumps(self.resp_data))
-        if "device" in self.request_data:
-            sentry_sdk.set_context("device", {"name": self.request_data["device"]})
-        sentry_sdk.capture_exception(self)
-        print("send data to sentry")
+        reporter = get_reporter()
+        if reporter is not None:
+            reporter.report(self)
+
+    def error_report(self) -> dict:
+        """The payload sent by the error reporter, built on its worker thread."""
+        return {
+            "error": self,
+            "tags": {
+                "env": settings.ENV,
+                "app": settings.SENTRY_APP_NAME,
+                "err_code": self.errcode,
+                "message": self.message,
+                "err_message": self.err_message,
+                "err_class": self.__class__.__name__,
+            },
+            "extras": {
+                "request_data": self.request_data_str,
+                "data": self.data_str,
+                "error_info": custom_json_dumps(self.err_info),
+                "error_data": custom_json_dumps(self.err_data),
+                "response_data": custom_json_dumps(self.resp_data),
+            },
+            "contexts": (
+                {"device": {"name": self.request_data["device"]}}
+                if "device" in self.request_data
+                else {}
+            ),
+        }
 
     @property
     def request(self) -> Optional[Union[HttpRequest, Request]]:
@@ -209,19 +204,22 @@ class AppException(Exception):
         self._data_str = custom_json_dumps(self.err_data)
         return self._data_str
 
+    def _normalize_err_info(self):
+        if self._err_info is None:
+            self._err_info = {}
+        elif not isinstance(self._err_info, dict):
+            self._err_info = {"info": self._err_info}
+
     @property
     def err_info(self) -> dict:
-        if not isinstance(self._err_info, dict):
-            try:
-                self._err_info = dict(self._err_info)
-            except Exception:
-                self._err_info = {"info": self._err_info}
-
         self.log_trace_to_err_info()
         return self._err_info
 
     @property
     def body(self) -> dict:
+        if hasattr(self, "_body"):
+            return self._body
+
         result = {
             "success": False,
             "message": self.message,
@@ -240,11 +238,21 @@ class AppException(Exception):
                     "error_data": self.err_data,
                 }
             )
-        return result
+        self._body = result
+        return self._body
+
+    @property
+    def content(self) -> bytes:
+        """The encoded response body, built once per exception."""
+        if hasattr(self, "_content"):
+            return self._content
+
+        self._content = render_envelope(self.body)
+        return self._content
 
     @property
     def resp(self) -> AppResponse:
-        return AppResponse(data=self.body, status=self.STATUS_CODE)
+        return AppResponse.from_content(self.content, status=self.STATUS_CODE)
 
     def __del__(self):
         self.notify_if_needed()
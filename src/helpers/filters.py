@@ -0,0 +1,22 @@
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .exceptions import BadRequestException
+
+
+class FilterBackend(DjangoFilterBackend):
+    """`DjangoFilterBackend` that reports invalid filter values as a 400 `AppException`."""
+
+    def filter_queryset(self, request, queryset, view):
+        filterset = self.get_filterset(request, queryset, view)
+        if filterset is None:
+            return queryset
+
+        if not filterset.is_valid():
+            raise BadRequestException(
+                400008,
+                f"Invalid filters: {', '.join(sorted(filterset.errors))}",
+                resp_data={
+                    "errors": {field: list(errors) for field, errors in filterset.errors.items()}
+                },
+            )
+        return filterset.qs
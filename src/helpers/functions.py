@@ -4,3 +4,20 @@ import string
 
 def generate_random_string(length=10):
     return "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def is_id(value):
+    """Whether `value` from a JSON body is a primary key: a positive int, not a bool."""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def to_id(value):
+    """`value` from a request as a primary key: an id or its ASCII digits, else None."""
+    if isinstance(value, str) and value.isascii() and value.isdecimal():
+        value = int(value)
+    return value if is_id(value) else None
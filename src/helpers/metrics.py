@@ -0,0 +1,278 @@
+"""Request metrics: wall time, SQL queries, serialization and render time, response size.
+
+`helpers.middlewares.MetricsMiddleware` measures every request into a `RequestMetrics` held
+in a context variable, which the query wrapper of every database connection and `timed()`
+blocks add to, including from the threads of `sync_to_async`. Each process aggregates the
+requests per view, action, method and status in `registry`.
+
+Worker processes each write their series to `settings.METRICS_DIR`, at most every
+`METRICS_FLUSH_INTERVAL` seconds, so the /metrics/ endpoint serves the sum of every worker
+of the host whichever one answers the scrape.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from math import inf
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Upper bounds of the request duration histogram, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LABELS = ("view", "action", "method", "status")
+# Totals kept per series besides the duration histogram: (name, help).
+TOTALS = (
+    ("db_queries", "SQL queries run by requests."),
+    ("db_seconds", "Time spent in SQL queries by requests."),
+    ("serialize_seconds", "Time spent serializing responses."),
+    ("render_seconds", "Time spent rendering responses."),
+    ("response_bytes", "Size of the responses, streaming responses excluded."),
+)
+FILE_PREFIX = "metrics-"
+ARCHIVE_FILE = f"{FILE_PREFIX}archive.json"
+
+current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Measurements of the request being served.
+
+    The SQL and duration of the queries that take at least `trace_after` seconds are kept in
+    `statements`, for `helpers.query_detector`.
+    """
+
+    __slots__ = ("start", "queries", "db", "timings", "trace_after", "statements")
+
+    def __init__(self, trace_after=inf):
+        self.start = perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.timings = {}
+        self.trace_after = trace_after
+        self.statements = []
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self, duration):
+        """`Server-Timing` header value, durations in milliseconds."""
+        parts = [
+            f"total;dur={duration * 1000:.1f}",
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items())
+        return ", ".join(parts)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the `name` timing of the current request."""
+    metrics = current.get()
+    if metrics is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper (see `connection.execute_wrapper`) that counts and times queries."""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - start
+        metrics.queries += 1
+        metrics.db += elapsed
+        if elapsed >= metrics.trace_after:
+            metrics.statements.append((sql, elapsed))
+
+
+def install_query_wrapper(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def wrap_new_connection(sender, connection, **kwargs):
+    install_query_wrapper(connection)
+
+
+def wrap_connections():
+    """Wrap the open connections of the current thread, `wrap_new_connection` the others."""
+    for connection in connections.all(initialized_only=True):
+        install_query_wrapper(connection)
+
+
+def new_series():
+    return {
+        "count": 0,
+        "duration_seconds": 0.0,
+        # Not cumulative, the last one counts the requests slower than every bound.
+        "buckets": [0] * (len(BUCKETS) + 1),
+        **{name: 0 for name, _ in TOTALS},
+    }
+
+
+def merge_series(into, snapshot):
+    """Add the series of `snapshot` to the `{labels: series}` dict `into`."""
+    for labels, series in snapshot.items():
+        target = into.setdefault(labels, new_series())
+        for name, value in series.items():
+            if name == "buckets":
+                target[name] = [a + b for a, b in zip(target[name], value)]
+            else:
+                target[name] += value
+    return into
+
+
+class MetricsRegistry:
+    """Series of the requests served by this process, by `LABELS`."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.series = {}
+        self.flushed_at = monotonic()
+
+    def observe(self, labels, duration, metrics, size=None):
+        bucket = bisect_left(BUCKETS, duration)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = new_series()
+            series["count"] += 1
+            series["duration_seconds"] += duration
+            series["buckets"][bucket] += 1
+            series["db_queries"] += metrics.queries
+            series["db_seconds"] += metrics.db
+            series["serialize_seconds"] += metrics.timings.get("serialize", 0.0)
+            series["render_seconds"] += metrics.timings.get("render", 0.0)
+            if size is not None:
+                series["response_bytes"] += size
+
+            flush = settings.METRICS_DIR and (
+                monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL
+            )
+            if flush:
+                self.flushed_at = monotonic()
+        if flush:
+            self.flush(settings.METRICS_DIR)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                labels: {**series, "buckets": list(series["buckets"])}
+                for labels, series in self.series.items()
+            }
+
+    def flush(self, directory):
+        write_series(os.path.join(directory, f"{FILE_PREFIX}{os.getpid()}.json"), self.snapshot())
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+
+registry = MetricsRegistry()
+
+
+def write_series(path, snapshot):
+    # Written to a temporary file and renamed, so readers never see a partial file.
+    rows = [[list(labels), series] for labels, series in snapshot.items()]
+    with NamedTemporaryFile("w", dir=os.path.dirname(path), delete=False) as file:
+        json.dump(rows, file)
+    os.replace(file.name, path)
+
+
+def read_series(path):
+    try:
+        with open(path) as file:
+            return {tuple(labels): series for labels, series in json.load(file)}
+    except (OSError, ValueError):
+        return {}
+
+
+def collect():
+    """Series of this process merged with those the other workers wrote to METRICS_DIR."""
+    merged = merge_series({}, registry.snapshot())
+    directory = settings.METRICS_DIR
+    if not directory:
+        return merged
+
+    own = f"{FILE_PREFIX}{os.getpid()}.json"
+    for name in os.listdir(directory):
+        if name.startswith(FILE_PREFIX) and name.endswith(".json") and name != own:
+            merge_series(merged, read_series(os.path.join(directory, name)))
+    return merged
+
+
+def archive_process(directory, pid):
+    """Fold the series of an exited worker into the archive file, so its counts are kept."""
+    path = os.path.join(directory, f"{FILE_PREFIX}{pid}.json")
+    series = read_series(path)
+    if series:
+        archive = os.path.join(directory, ARCHIVE_FILE)
+        write_series(archive, merge_series(read_series(archive), series))
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def clear_directory(directory):
+    """Remove the series of a previous server, counters restart from zero with it."""
+    for name in os.listdir(directory):
+        if name.startswith(FILE_PREFIX):
+            os.remove(os.path.join(directory, name))
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, **extra):
+    pairs = [*zip(LABELS, labels), *extra.items()]
+    return ",".join(f'{name}="{escape(value)}"' for name, value in pairs)
+
+
+def render_prometheus(series):
+    """Prometheus text exposition format (version 0.0.4) of `{labels: series}`."""
+    items = sorted(series.items())
+    lines = [
+        "# HELP http_requests_total Requests served.",
+        "# TYPE http_requests_total counter",
+    ]
+    lines.extend(f"http_requests_total{{{format_labels(k)}}} {s['count']}" for k, s in items)
+
+    lines.append("# HELP http_request_duration_seconds Wall time of requests.")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for labels, s in items:
+        cumulative = 0
+        for bound, count in zip([*BUCKETS, "+Inf"], s["buckets"]):
+            cumulative += count
+            label_text = format_labels(labels, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{{{label_text}}} {cumulative}")
+        label_text = format_labels(labels)
+        lines.append(f"http_request_duration_seconds_sum{{{label_text}}} {s['duration_seconds']}")
+        lines.append(f"http_request_duration_seconds_count{{{label_text}}} {s['count']}")
+
+    for name, help_text in TOTALS:
+        metric = f"http_request_{name}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f"{metric}{{{format_labels(k)}}} {s[name]}" for k, s in items)
+    return "\n".join(lines) + "\n"
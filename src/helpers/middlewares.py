@@ -1,3 +1,17 @@
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import RequestMetrics, current, registry, wrap_connections
+from .profiling import NAME_HEADER, may_profile, requested_profiler, sampled_profiler, save_profile
+from .query_detector import check_queries, trace_after
+
+logger = logging.getLogger(__name__)
+
+
 class DisableCSRFMiddleware(object):
     def __init__(self, get_response):
         self.get_response = get_response
@@ -6,3 +20,135 @@ class DisableCSRFMiddleware(object):
         setattr(request, "_dont_enforce_csrf_checks", True)
         response = self.get_response(request)
         return response
+
+
+class MetricsMiddleware:
+    """Measure every request into `helpers.metrics` and add a `Server-Timing` header.
+
+    Requests are labelled with the view class (or function) name and, for viewsets, the
+    action. The duration of streaming responses stops when their content starts streaming.
+    The queries are then checked by `helpers.query_detector`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Later connections are wrapped when they are opened.
+        wrap_connections()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics(trace_after())
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(trace_after())
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        duration = perf_counter() - metrics.start
+        view, name, action = resolve_view(request)
+        labels = (name, action, request.method, str(response.status_code))
+        size = None if response.streaming else len(response.content)
+        registry.observe(labels, duration, metrics, size)
+
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing(duration)
+        check_queries(request, view, name, action, metrics)
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile requests on demand or by sampling, see `helpers.profiling`.
+
+    Placed last, so that the profile covers the whole DRF dispatch: authentication,
+    permissions, the view, serialization and rendering.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        profiler = requested_profiler(request)
+        requested = profiler is not None and may_profile(request)
+        profiler = profiler if requested else sampled_profiler()
+        if profiler is None:
+            return self.get_response(request)
+
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        return self.finish(request, response, profiler, requested)
+
+    async def __acall__(self, request):
+        profiler = requested_profiler(request)
+        requested = profiler is not None and await sync_to_async(may_profile)(request)
+        profiler = profiler if requested else sampled_profiler()
+        if profiler is None:
+            return await self.get_response(request)
+
+        profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        return self.finish(request, response, profiler, requested)
+
+    def finish(self, request, response, profiler, requested):
+        _, view, action = resolve_view(request)
+        try:
+            name = save_profile(profiler, view, action)
+        except OSError:
+            logger.exception("Could not save the profile of %s", request.path)
+            return response
+        # Sampled profiles are not announced to the users that happened to send the request.
+        if requested:
+            response[NAME_HEADER] = name
+        return response
+
+
+def resolve_view(request):
+    """`(view, name, action)` of the view that served `request`: its class (None for function
+    views), name and action, the lowercase method for non-viewsets."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None, "unmatched", ""
+
+    func = match.func
+    view = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    name = view.__name__ if view is not None else getattr(func, "__name__", "unknown")
+    actions = getattr(func, "actions", None)
+    method = request.method.lower()
+    return view, name, actions.get(method, method) if actions else method
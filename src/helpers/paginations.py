@@ -0,0 +1,197 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import partial
+from json import dumps, loads
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .exceptions import BadRequestException
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (cursor) pagination ordered by one model field plus the primary key.
+
+    The ordering field is taken from the view's `OrderingFilter` (only the first
+    field is used) and the primary key breaks ties, so every row has a unique
+    position and a page costs the same at any depth. NULL values sort as the
+    largest values, like PostgreSQL does, so plain btree indexes serve both
+    directions.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    default_ordering = "-_created"
+    tie_breaker = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, cursor = self.get_page_queryset(queryset, request, view)
+        return self.set_page(list(queryset), cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, the page is read with `aiterator()`."""
+        queryset, cursor = self.get_page_queryset(queryset, request, view)
+        return self.set_page([instance async for instance in queryset.aiterator()], cursor)
+
+    def get_page_queryset(self, queryset, request, view):
+        """Return the unevaluated queryset of the requested page and the decoded cursor."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        self.output_field = self.get_output_field(queryset, self.field)
+        self.nullable = self.output_field.null
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(cursor["value"], cursor["id"], reverse)
+            )
+        # One extra row tells whether there is a page after this one.
+        return queryset[: self.page_size + 1], cursor
+
+    def set_page(self, results, cursor):
+        reverse = cursor is not None and cursor["reverse"]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_page_size(self, request):
+        page_size = settings.TASK_PAGE_SIZE
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+        return max(1, min(page_size, settings.TASK_MAX_PAGE_SIZE))
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+
+        field = ordering[0] if ordering else self.default_ordering
+        if isinstance(field, str) and field.lstrip("-") not in ("pk", self.tie_breaker):
+            return field.lstrip("-"), field.startswith("-")
+        return self.default_ordering.lstrip("-"), self.default_ordering.startswith("-")
+
+    @staticmethod
+    def get_output_field(queryset, name):
+        """The model field, or the output field of an annotation such as a search rank."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def get_order_by(self, reverse=False):
+        if self.descending != reverse:
+            nulls = {"nulls_first": True} if self.nullable else {}
+            return [F(self.field).desc(**nulls), F(self.tie_breaker).desc()]
+
+        nulls = {"nulls_last": True} if self.nullable else {}
+        return [F(self.field).asc(**nulls), F(self.tie_breaker).asc()]
+
+    def get_position_filter(self, value, pk, reverse=False):
+        """Select the rows that come after the given position in traversal order."""
+        descending = self.descending != reverse
+        op = "lt" if descending else "gt"
+        tie_breaker = f"{self.tie_breaker}__{op}"
+
+        if value is None:
+            query = Q(**{f"{self.field}__isnull": True, tie_breaker: pk})
+            if descending:
+                query |= Q(**{f"{self.field}__isnull": False})
+            return query
+
+        query = Q(**{f"{self.field}__{op}": value}) | Q(**{self.field: value, tie_breaker: pk})
+        if self.nullable and not descending:
+            query |= Q(**{f"{self.field}__isnull": True})
+        return query
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        # Pages of `values()` querysets hold dicts.
+        get = instance.get if isinstance(instance, dict) else partial(getattr, instance)
+        value = get(self.field)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+
+        position = {"v": value, "id": get(self.tie_breaker), "r": int(reverse)}
+        cursor = b64encode(dumps(position).encode("ascii")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = loads(b64decode(encoded.encode("ascii")).decode("ascii"))
+            value = position["v"]
+            if value is not None:
+                value = self.output_field.to_python(value)
+            return {
+                "value": value,
+                "id": int(position["id"]),
+                "reverse": bool(position["r"]),
+            }
+        except (
+            KeyError,
+            TypeError,
+            ValueError,
+            ValidationError,
+            UnicodeError,
+        ):
+            raise BadRequestException(400001, "Invalid cursor")
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,197 @@
+import os
+import weakref
+from collections import deque
+from threading import Condition, RLock
+from time import monotonic
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections, shared by every thread of one process.
+
+    Connections are handed out most recently used first so the warm ones are reused and the
+    others age out after `max_idle` seconds. A connection idle for longer than `check_after`
+    seconds is pinged before it is handed out. When all `max_size` connections are in use,
+    `acquire` waits up to `timeout` seconds for one to be released. A connection that is
+    dropped without being released (e.g. by a thread that died) frees its slot when it is
+    garbage collected.
+    """
+
+    rate_window = 60
+
+    def __init__(self, max_size, timeout=5.0, max_idle=300, check_after=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+
+        # Reentrant: a lost connection can be collected while this thread holds the lock.
+        self._lock = Condition(RLock())
+        self._idle = deque()
+        self._size = 0
+        self._finalizers = {}
+        self._created_at = deque()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.closed = 0
+
+    def acquire(self, create):
+        """Return an idle connection, or one made by `create` while the pool is not full."""
+        deadline = started = None
+        while True:
+            connection = None
+            with self._lock:
+                if self._idle:
+                    connection, released_at = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    if deadline is None:
+                        started = monotonic()
+                        deadline = started + self.timeout
+                        self.waits += 1
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self.wait_seconds += monotonic() - started
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._lock.wait(remaining)
+                    continue
+                if started is not None:
+                    self.wait_seconds += monotonic() - started
+
+            if connection is None:
+                return self._checkout(self._create(create))
+            if self._reusable(connection, monotonic() - released_at):
+                return self._checkout(connection)
+            self._discard(connection)
+
+    def release(self, connection, discard=False):
+        if not discard:
+            try:
+                discard = not self.reset(connection)
+            except Exception:
+                discard = True
+
+        expired = []
+        with self._lock:
+            finalizer = self._finalizers.pop(id(connection), None)
+            if finalizer is not None:
+                finalizer.detach()
+            if discard:
+                self._size -= 1
+                self.closed += 1
+            else:
+                self._idle.append((connection, monotonic()))
+            now = monotonic()
+            while self._idle and now - self._idle[0][1] > self.max_idle:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+                self.closed += 1
+            self._lock.notify(1 + len(expired))
+
+        for expired_connection in expired:
+            self._close(expired_connection)
+        if discard:
+            self._close(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self.closed += len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._lock:
+            self._prune_created_at(monotonic())
+            return {
+                "pid": os.getpid(),
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "closed": self.closed,
+                "created_per_minute": len(self._created_at) * 60 / self.rate_window,
+            }
+
+    def is_usable(self, connection, idle_for):
+        """Whether a connection idle for `idle_for` seconds can be handed out again."""
+        return True
+
+    def reset(self, connection):
+        """Make a released connection ready for its next user, False if it must be closed."""
+        connection.rollback()
+        return True
+
+    def close(self, connection):
+        connection.close()
+
+    def _create(self, create):
+        try:
+            connection = create()
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            now = monotonic()
+            self.created += 1
+            self._created_at.append(now)
+            self._prune_created_at(now)
+        return connection
+
+    def _checkout(self, connection):
+        finalizer = weakref.finalize(connection, self._lost, id(connection))
+        finalizer.atexit = False
+        with self._lock:
+            self._finalizers[id(connection)] = finalizer
+        return connection
+
+    def _lost(self, key):
+        with self._lock:
+            self._finalizers.pop(key, None)
+            self._size -= 1
+            self.closed += 1
+            self._lock.notify()
+
+    def _reusable(self, connection, idle_for):
+        if idle_for > self.max_idle:
+            return False
+        try:
+            return self.is_usable(connection, idle_for)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        with self._lock:
+            self._size -= 1
+            self.closed += 1
+            self._lock.notify()
+        self._close(connection)
+
+    def _close(self, connection):
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _prune_created_at(self, now):
+        while self._created_at and now - self._created_at[0] > self.rate_window:
+            self._created_at.popleft()
@@ -0,0 +1,92 @@
+"""PostgreSQL backend that takes its connections from a per-process `ConnectionPool`.
+
+Enabled with `DB_POOL_SIZE`, see app/settings.py. Django still opens and closes a connection
+per request (CONN_MAX_AGE=0), but closing returns it to the pool, so threaded WSGI workers
+and ASGI workers, whose thread-sensitive executors hold connections per request, share at
+most DB_POOL_SIZE connections per process.
+"""
+
+import os
+from threading import Lock
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from helpers.pools import ConnectionPool, PoolTimeout
+
+# psycopg2 TRANSACTION_STATUS_IDLE and psycopg TransactionStatus.IDLE.
+TRANSACTION_STATUS_IDLE = 0
+
+_pools = {}
+_pools_lock = Lock()
+
+
+class PostgresConnectionPool(ConnectionPool):
+    def is_usable(self, connection, idle_for):
+        if connection.closed:
+            return False
+        if idle_for >= self.check_after:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        return True
+
+    def reset(self, connection):
+        if connection.closed:
+            return False
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        return True
+
+
+def get_pool(alias, conn_params):
+    # Keyed by pid so forked workers never share sockets, and by the connection parameters
+    # so the test database and the "postgres" maintenance database get their own pools.
+    params = tuple(sorted((name, repr(value)) for name, value in conn_params.items()))
+    key = (os.getpid(), alias, params)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = PostgresConnectionPool(
+                    max_size=settings.DB_POOL_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    check_after=settings.DB_POOL_CHECK_AFTER,
+                )
+    return pool
+
+
+def pool_stats():
+    """Stats of the pools of the current process."""
+    pid = os.getpid()
+    return [
+        {"alias": alias, **pool.stats()}
+        for (pool_pid, alias, _), pool in list(_pools.items())
+        if pool_pid == pid
+    ]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params)
+        try:
+            connection = self.pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+        # Set by the parent class only for new connections.
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = IsolationLevel(
+            options.get("isolation_level", IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
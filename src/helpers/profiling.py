@@ -0,0 +1,159 @@
+"""On-demand and sampled profiles of single requests.
+
+`helpers.middlewares.ProfilingMiddleware` profiles a request when the user is allowed by
+`settings.PROFILING_PERMISSION_CLASS` and sends the `X-Profile` header: `X-Profile: sample`
+runs the sampling profiler, any other value cProfile. The name of the profile is returned
+in the `X-Profile-Name` header and /profiles/<name> downloads it. Besides those,
+`PROFILING_SAMPLE_RATE` of all requests are profiled with the sampling profiler.
+
+Profiles are written to `settings.PROFILING_DIR`, where only the newest
+`PROFILING_MAX_FILES` are kept:
+
+- cProfile dumps (`.prof`) open with `python -m pstats` or snakeviz.
+- Sampling profiles (`.txt`) are collapsed stacks (`frame;frame;frame count`) for
+  flamegraph.pl or speedscope. The sampler reads the stack of the request thread every
+  `PROFILING_SAMPLE_INTERVAL` seconds, so it costs far less than cProfile.
+
+The profiles of async views cover the event loop thread only, and whatever other requests
+it served meanwhile.
+"""
+
+import cProfile
+import os
+import re
+import sys
+import time
+from collections import Counter
+from random import random
+from secrets import token_hex
+from threading import Event, Thread, get_ident
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+HEADER = "X-Profile"
+NAME_HEADER = "X-Profile-Name"
+NAME = re.compile(r"^[\w.-]+\.(prof|txt)$")
+
+
+class CProfiler:
+    extension = "prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingProfiler:
+    """Counts the stacks of the thread that starts it, read from a background thread."""
+
+    extension = "txt"
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.PROFILING_SAMPLE_INTERVAL
+        self.stacks = Counter()
+        self.stopped = Event()
+        self.sampler = None
+
+    def start(self):
+        self.sampler = Thread(target=self.sample, args=(get_ident(),), daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def sample(self, thread_id):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def requested_profiler(request):
+    """The profiler asked for by the `X-Profile` header, None without it."""
+    kind = request.headers.get(HEADER)
+    if not kind:
+        return None
+    return SamplingProfiler() if kind == "sample" else CProfiler()
+
+
+def sampled_profiler():
+    """A sampling profiler for `PROFILING_SAMPLE_RATE` of the calls, None for the others."""
+    rate = settings.PROFILING_SAMPLE_RATE
+    return SamplingProfiler() if rate and random() < rate else None
+
+
+def may_profile(request):
+    """Whether the user of `request`, authenticated as DRF views do, may ask for profiles."""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    drf_request = Request(request, authenticators=authenticators)
+    try:
+        return import_string(settings.PROFILING_PERMISSION_CLASS)().has_permission(
+            drf_request, None
+        )
+    except APIException:
+        return False
+
+
+def save_profile(profiler, view, action):
+    """Write the profile to PROFILING_DIR, drop the oldest ones and return its name."""
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    # Names start with the time, so they sort from oldest to newest.
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    label = re.sub(r"[^\w-]", "_", f"{view}-{action}")
+    name = f"{stamp}-{label}-{os.getpid()}-{token_hex(3)}.{profiler.extension}"
+    profiler.dump(os.path.join(directory, name))
+
+    names = sorted(entry for entry in os.listdir(directory) if NAME.match(entry))
+    for old in names[: -settings.PROFILING_MAX_FILES]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass  # Removed by another worker.
+    return name
+
+
+def list_profiles():
+    """Stored profiles, newest first."""
+    directory = settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if NAME.match(name):
+            try:
+                size = os.path.getsize(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue  # Rotated out meanwhile.
+            profiles.append({"name": name, "size": size})
+    return profiles
+
+
+def profile_path(name):
+    """Path of the stored profile `name`, None if there is no such profile."""
+    if not NAME.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,122 @@
+"""Opt-in detection of N+1 queries, slow queries and query budget overruns per request.
+
+Runs on the queries counted by `helpers.middlewares.MetricsMiddleware` and is set with
+`settings.QUERY_DETECTOR_MODE`:
+
+- "raise" (the default under `manage.py test`) checks every request and raises
+  `QueryProblems` for repeated queries and budget overruns, which fails the test that made
+  them. Slow queries are only logged, as their timing depends on the load of the host.
+- "log" logs a warning: slow queries are looked for in every request; budgets and repeated
+  queries in the `QUERY_DETECTOR_SAMPLE_RATE` share of requests whose queries are all kept.
+- "off" (the default) keeps no statements.
+
+A query is repeated when the same SQL shape (the SQL with `IN (%s, ...)` and `VALUES` lists
+collapsed) runs `QUERY_DETECTOR_REPEAT_THRESHOLD` times or more in one request, the usual
+sign of an N+1 loop; actions listed in the `query_repeats_allowed` of their view are not
+checked for it. Budgets are the most queries a view action may run, set in the
+`query_budgets` dict of the view (`{"list": 2}`) or `settings.QUERY_BUDGETS`
+(`{"EmployerTaskViewSet.list": 2}`), which takes precedence.
+"""
+
+import json
+import logging
+import re
+from math import inf
+from random import random
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_LIST = re.compile(r"\((?:%s, )*%s\)")
+ROW_LIST = re.compile(r"VALUES \(%s\.\.\.\)(?:, \(%s\.\.\.\))*")
+# Statements worth grouping; savepoints and the like are left out.
+GROUPED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryProblems(Exception):
+    """Raised when a request runs repeated or slow queries, or more than its budget."""
+
+
+def shape(sql):
+    """`sql` with its placeholder lists collapsed, the same for any number of parameters."""
+    return ROW_LIST.sub("VALUES (%s...)...", PLACEHOLDER_LIST.sub("(%s...)", sql))
+
+
+def trace_after():
+    """The duration from which the statements of a new request are kept, see `RequestMetrics`."""
+    mode = settings.QUERY_DETECTOR_MODE
+    if mode == "off":
+        return inf
+    if mode == "raise" or random() < settings.QUERY_DETECTOR_SAMPLE_RATE:
+        return 0.0
+    return settings.QUERY_DETECTOR_SLOW_MS / 1000
+
+
+def get_budget(view, name, action):
+    budget = settings.QUERY_BUDGETS.get(f"{name}.{action}")
+    if budget is None:
+        budget = getattr(view, "query_budgets", {}).get(action)
+    return budget
+
+
+def find_problems(metrics, budget, repeats_allowed=False):
+    problems = {}
+    slow_after = settings.QUERY_DETECTOR_SLOW_MS / 1000
+    slow = [
+        {"sql": sql, "ms": round(elapsed * 1000, 1)}
+        for sql, elapsed in metrics.statements
+        if elapsed >= slow_after
+    ]
+    if slow:
+        problems["slow"] = slow
+
+    # Budgets and repeats need every statement, the requests that were not sampled have
+    # only their slow ones.
+    if metrics.trace_after > 0:
+        return problems
+
+    if budget is not None and metrics.queries > budget:
+        problems["over_budget"] = {"queries": metrics.queries, "budget": budget}
+
+    if repeats_allowed:
+        return problems
+
+    groups = {}
+    for sql, elapsed in metrics.statements:
+        if sql.lstrip().upper().startswith(GROUPED_STATEMENTS):
+            group = groups.setdefault(shape(sql), [0, 0.0])
+            group[0] += 1
+            group[1] += elapsed
+    repeated = [
+        {"sql": sql, "count": count, "ms": round(elapsed * 1000, 1)}
+        for sql, (count, elapsed) in groups.items()
+        if count >= settings.QUERY_DETECTOR_REPEAT_THRESHOLD
+    ]
+    if repeated:
+        problems["repeated"] = repeated
+    return problems
+
+
+def check_queries(request, view, name, action, metrics):
+    """Log or raise the query problems of a served request, see the module docstring."""
+    mode = settings.QUERY_DETECTOR_MODE
+    if mode == "off":
+        return
+
+    repeats_allowed = action in getattr(view, "query_repeats_allowed", ())
+    problems = find_problems(metrics, get_budget(view, name, action), repeats_allowed)
+    if not problems:
+        return
+
+    report = {
+        "view": name,
+        "action": action,
+        "method": request.method,
+        "path": request.path,
+        "queries": metrics.queries,
+        **problems,
+    }
+    if mode == "raise" and problems.keys() - {"slow"}:
+        raise QueryProblems(json.dumps(report, indent=2))
+    logger.warning("Query problems: %s", json.dumps(report))
@@ -0,0 +1,189 @@
+import atexit
+import logging
+import os
+import time
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+sentry_initialized = False
+
+
+def init_sentry():
+    """Initialize sentry_sdk once per process."""
+    global sentry_initialized
+    if sentry_initialized:
+        return
+    sentry_initialized = True
+
+    import sentry_sdk
+
+    sentry_sdk.init(
+        dsn=settings.SENTRY_DSN,
+        integrations=settings.SENTRY_INTEGRATIONS,
+        sample_rate=settings.SENTRY_SAMPLE_RATE,
+        traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+        # If you wish to associate users to errors (assuming you are using
+        # django.contrib.auth) you may enable sending PII data.
+        send_default_pii=True,
+    )
+    logger.info("Sentry initialized")
+
+
+class SentryTransport:
+    """Send error reports to Sentry."""
+
+    def send(self, report: dict):
+        import sentry_sdk
+
+        init_sentry()  # Not initialized yet with `settings.SENTRY_LAZY_INIT`.
+        new_scope = getattr(sentry_sdk, "new_scope", None) or sentry_sdk.push_scope
+        with new_scope() as scope:
+            for key, value in report["tags"].items():
+                scope.set_tag(key, value)
+            for key, value in report["extras"].items():
+                scope.set_extra(key, value)
+            for key, value in report["contexts"].items():
+                scope.set_context(key, value)
+            sentry_sdk.capture_exception(report["error"])
+
+
+class MemoryTransport:
+    """Keep error reports in memory, a stand-in for Sentry in tests and local runs."""
+
+    def __init__(self):
+        self.reports = []
+
+    def send(self, report: dict):
+        self.reports.append(report)
+
+
+class ErrorReporter:
+    """Report errors from a background thread so failing requests never wait on the transport.
+
+    `report()` only applies deduplication, keyed by `errcode` and exception class, and rate
+    limiting, keyed by `errcode`, and puts the error on a bounded queue; errors are dropped when the queue is full. The report payload
+    is built and sent by the worker thread.
+    """
+
+    def __init__(
+        self,
+        transport,
+        queue_size: int = 1000,
+        rate_limit: int = 10,
+        rate_window: float = 60,
+        dedupe_window: float = 60,
+    ):
+        self.transport = transport
+        self.queue_size = queue_size
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.dedupe_window = dedupe_window
+        self.stats = dict.fromkeys(
+            ["queued", "sent", "failed", "dropped", "deduplicated", "rate_limited"], 0
+        )
+        self._lock = Lock()
+        self._seen = {}
+        self._windows = {}
+        self._pid = None
+
+    def report(self, error) -> bool:
+        if not self.allow(error):
+            return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(error)
+        except Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def allow(self, error) -> bool:
+        now = time.monotonic()
+        # Messages often carry per-request detail, so they are not part of the key.
+        fingerprint = (error.errcode, type(error).__name__)
+        with self._lock:
+            if now - self._seen.get(fingerprint, -self.dedupe_window) < self.dedupe_window:
+                self.stats["deduplicated"] += 1
+                return False
+            if len(self._seen) > 10 * self.queue_size:
+                self._seen = {
+                    key: seen_at
+                    for key, seen_at in self._seen.items()
+                    if now - seen_at < self.dedupe_window
+                }
+            self._seen[fingerprint] = now
+
+            window_start, count = self._windows.get(error.errcode, (now, 0))
+            if now - window_start >= self.rate_window:
+                window_start, count = now, 0
+            if count >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return False
+            self._windows[error.errcode] = (window_start, count + 1)
+        return True
+
+    def flush(self, timeout: float = 2) -> bool:
+        """Wait until every queued error is sent. Returns False on timeout."""
+        if self._pid != os.getpid():
+            return True
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so every worker process starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = Queue(maxsize=self.queue_size)
+            Thread(target=self._run, name="error-reporter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        queue = self._queue
+        while True:
+            error = queue.get()
+            try:
+                self.transport.send(error.error_report())
+                self.stats["sent"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("Failed to report error %s", getattr(error, "errcode", None))
+            finally:
+                del error
+                queue.task_done()
+
+
+_reporter = None
+_reporter_lock = Lock()
+
+
+def get_reporter() -> Optional[ErrorReporter]:
+    """The process-wide reporter built from settings, or None when reporting is disabled."""
+    global _reporter
+
+    if _reporter is None and settings.ERROR_REPORT_TRANSPORT:
+        with _reporter_lock:
+            if _reporter is None:
+                _reporter = ErrorReporter(
+                    import_string(settings.ERROR_REPORT_TRANSPORT)(),
+                    queue_size=settings.ERROR_REPORT_QUEUE_SIZE,
+                    rate_limit=settings.ERROR_REPORT_RATE_LIMIT,
+                    rate_window=settings.ERROR_REPORT_RATE_WINDOW,
+                    dedupe_window=settings.ERROR_REPORT_DEDUPE_WINDOW,
+                )
+                atexit.register(_reporter.flush)
+    return _reporter
@@ -7,5 +7,10 @@ try:
 except ImportError:
     Request = NoClass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
-__all__ = ["Request"]
+__all__ = ["Request", "orjson"]
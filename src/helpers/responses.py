@@ -1,9 +1,42 @@
 from json import JSONEncoder
 from typing import Any, Dict, Optional, Type
 
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 
-from .encoders import CustomEncoder
+from .encoders import CustomEncoder, fast_json_dumps
+from .metrics import timed
+
+SUCCESS_ENVELOPE_PREFIX = b'{"success":true,"message":"Success","data":'
+
+
+def wrap_response_data(data: Any) -> Any:
+    """Wrap `data` in the `{"success", "message", "data"}` response envelope."""
+    if (
+        data is None
+        or isinstance(data, list)
+        or (isinstance(data, dict) and "message" not in data)
+    ):
+        return {"success": True, "message": "Success", "data": data}
+    if isinstance(data, dict):
+        return {**{"success": True, "message": "Success"}, **data}
+    if isinstance(data, str):
+        return {"success": True, "message": data}
+    return data
+
+
+def render_envelope(data: Any) -> bytes:
+    """Encode `data` in the response envelope with `fast_json_dumps`.
+
+    The common case (lists and dicts without a message) is rendered by encoding the data once
+    and splicing it into a constant envelope prefix.
+    """
+    if (
+        data is None
+        or isinstance(data, list)
+        or (isinstance(data, dict) and "message" not in data)
+    ):
+        return b"".join((SUCCESS_ENVELOPE_PREFIX, fast_json_dumps(data), b"}"))
+    return fast_json_dumps(wrap_response_data(data))
 
 
 class CustomJsonResponse(JsonResponse):
@@ -15,19 +48,25 @@ class CustomJsonResponse(JsonResponse):
         json_dumps_params: Optional[Dict[str, Any]] = None,
         **kwargs: Any
     ) -> None:
-        if (
-            data is None
-            or isinstance(data, list)
-            or (isinstance(data, dict) and "message" not in data)
-        ):
-            data = {"success": True, "message": "Success", "data": data}
-        elif isinstance(data, dict):
-            data = {**{"success": True, "message": "Success"}, **data}
-        elif isinstance(data, str):
-            data = {"success": True, "message": data}
-
+        data = wrap_response_data(data)
         super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
 
 
-class AppResponse(CustomJsonResponse):
-    """Use this class to return a response from a view."""
+class AppResponse(HttpResponse):
+    """Use this class to return a response from a view. The envelope is encoded by
+    `render_envelope`, so there is no `encoder`/`json_dumps_params` to pass; use
+    `CustomJsonResponse` when those are needed."""
+
+    def __init__(self, data: Any, **kwargs: Any) -> None:
+        with timed("render"):
+            content = render_envelope(data)
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content, **kwargs)
+
+    @classmethod
+    def from_content(cls, content: bytes, **kwargs: Any) -> "AppResponse":
+        """Build the response from an already encoded envelope, skipping the JSON encoding."""
+        response = cls.__new__(cls)
+        kwargs.setdefault("content_type", "application/json")
+        HttpResponse.__init__(response, content, **kwargs)
+        return response
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from .metrics import timed
+
+
+class SparseFieldsSerializerMixin:
+    """Keeps only the fields named in the `fields` entry of the serializer context.
+
+    `fields` is a collection of field names, or None (the default) for every field. It is
+    usually set by `helpers.views.SparseFieldsViewMixin` from `?fields=` and `?expand=`.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get("fields")
+        if selected is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+class TimedDataMixin:
+    """Adds the time spent building `.data` to the "serialize" timing of the request metrics.
+
+    Use it with `TimedListSerializer` as the `list_serializer_class`, lists are built by the
+    list serializer without reading `.data` of the child.
+    """
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
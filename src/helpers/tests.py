@@ -0,0 +1,341 @@
+import gc
+import os
+from collections import UserDict, UserList
+from datetime import datetime, timezone
+from decimal import Decimal
+from json import loads
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest import mock
+
+from django.forms.utils import ErrorDict, ErrorList
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+
+from app import startup
+from helpers import reporting
+from helpers.encoders import fast_json_dumps
+from helpers.exceptions import BadRequestException, ServerErrorException
+from helpers.metrics import (
+    MetricsRegistry,
+    RequestMetrics,
+    archive_process,
+    collect,
+    render_prometheus,
+    write_series,
+)
+from helpers.pools import ConnectionPool, PoolTimeout
+from helpers.query_detector import find_problems, shape
+from helpers.reporting import ErrorReporter, MemoryTransport
+from helpers.responses import AppResponse, CustomJsonResponse
+
+
+class BlockingTransport(MemoryTransport):
+    def __init__(self):
+        super().__init__()
+        self.release = Event()
+
+    def send(self, report):
+        self.release.wait(2)
+        super().send(report)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rollbacks = 0
+        self.closed = False
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class ErrorReporterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.reporter = ErrorReporter(self.transport, rate_limit=3)
+
+    def test_report_is_sent_in_background(self):
+        self.assertTrue(self.reporter.report(ServerErrorException(500001, err_data={"a": 1})))
+        self.assertTrue(self.reporter.flush())
+
+        [report] = self.transport.reports
+        self.assertEqual(report["tags"]["err_code"], 500001)
+        self.assertEqual(report["tags"]["err_class"], "ServerErrorException")
+        self.assertEqual(report["extras"]["error_data"], '{"a": 1}')
+        self.assertIn("trace", report["extras"]["error_info"])
+
+    def test_duplicates_are_dropped(self):
+        results = [
+            self.reporter.report(ServerErrorException(500001, err_message=f"task {i} failed"))
+            for i in range(5)
+        ]
+        self.reporter.report(BadRequestException(500001, notify=True))
+        self.reporter.flush()
+
+        self.assertEqual(results, [True, False, False, False, False])
+        self.assertEqual(len(self.transport.reports), 2)
+        self.assertEqual(self.reporter.stats["deduplicated"], 4)
+
+    def test_rate_limit_per_errcode(self):
+        self.reporter.dedupe_window = 0
+        for i in range(5):
+            self.reporter.report(ServerErrorException(500001, err_message=f"error {i}"))
+        self.reporter.report(ServerErrorException(500002))
+        self.reporter.flush()
+
+        codes = [report["tags"]["err_code"] for report in self.transport.reports]
+        self.assertEqual(codes, [500001] * 3 + [500002])
+        self.assertEqual(self.reporter.stats["rate_limited"], 2)
+
+    def test_full_queue_drops_errors(self):
+        transport = BlockingTransport()
+        reporter = ErrorReporter(transport, queue_size=1, dedupe_window=0, rate_limit=100)
+        results = [reporter.report(ServerErrorException(500001)) for _ in range(5)]
+        transport.release.set()
+        reporter.flush()
+
+        self.assertTrue(results[0])
+        self.assertEqual(reporter.stats["dropped"], results.count(False))
+        self.assertGreater(reporter.stats["dropped"], 0)
+        self.assertEqual(len(transport.reports), results.count(True))
+
+    def test_notify_uses_reporter(self):
+        with mock.patch.object(reporting, "_reporter", self.reporter):
+            BadRequestException(400001).notify_if_needed()
+            ServerErrorException(500003).notify_if_needed()
+        self.reporter.flush()
+
+        codes = [report["tags"]["err_code"] for report in self.transport.reports]
+        self.assertEqual(codes, [500003])
+
+
+class FastJsonDumpsTestCase(SimpleTestCase):
+    def test_orjson_and_stdlib_match(self):
+        data = {
+            "errors": ErrorDict(status=ErrorList(["Select a valid choice."])),
+            "list": UserList([1, 2]),
+            "dict": UserDict(a=1),
+            "amount": Decimal("1.50"),
+            "message": gettext_lazy("Not found."),
+            "when": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        }
+        expected = {
+            "errors": {"status": ["Select a valid choice."]},
+            "list": [1, 2],
+            "dict": {"a": 1},
+            "amount": "1.50",
+            "message": "Not found.",
+            "when": "2026-01-02T03:04:05Z",
+        }
+
+        content = fast_json_dumps(data)
+        self.assertEqual(loads(content), expected)
+        with mock.patch("helpers.encoders.orjson", None):
+            self.assertEqual(fast_json_dumps(data), content)
+
+
+class AppExceptionTestCase(SimpleTestCase):
+    def test_response_matches_app_response(self):
+        for debug in (False, True):
+            with self.settings(DEBUG=debug):
+                exc = BadRequestException(400001, "Invalid", resp_data={"field": ["required"]})
+                response = exc.resp
+
+            self.assertIsInstance(response, AppResponse)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(
+                loads(response.content), loads(CustomJsonResponse(exc.body, status=400).content)
+            )
+
+    def test_trace_is_collected_lazily(self):
+        try:
+            raise ValueError("boom")
+        except ValueError as error:
+            exc = ServerErrorException(500001, error=error, notify=False)
+
+        exc.resp
+        self.assertIsNone(exc._err_info)
+        self.assertEqual(exc.err_info["type"], "ValueError")
+        self.assertEqual(exc.err_info["trace"][0]["name"], "test_trace_is_collected_lazily")
+
+    def test_body_is_cached(self):
+        exc = BadRequestException(400001)
+        self.assertIs(exc.body, exc.body)
+        self.assertIs(exc.content, exc.content)
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, timeout=0.05)
+
+    def test_released_connection_is_reused(self):
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.release(connection)
+
+        self.assertIs(self.pool.acquire(FakeConnection), connection)
+        self.assertEqual(connection.rollbacks, 1)
+        stats = self.pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["created_per_minute"], 1)
+        self.assertEqual(stats["in_use"], 1)
+        self.assertEqual(stats["idle"], 0)
+
+    def test_full_pool_times_out(self):
+        connections = [self.pool.acquire(FakeConnection), self.pool.acquire(FakeConnection)]
+
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(FakeConnection)
+        stats = self.pool.stats()
+        self.assertEqual((stats["waits"], stats["timeouts"], stats["size"]), (1, 1, 2))
+        self.pool.release(connections[0])
+
+    def test_waiter_gets_released_connection(self):
+        self.pool.timeout = 2
+        first, second = self.pool.acquire(FakeConnection), self.pool.acquire(FakeConnection)
+        acquired = []
+        waiter = Thread(target=lambda: acquired.append(self.pool.acquire(FakeConnection)))
+        waiter.start()
+
+        self.pool.release(first)
+        waiter.join(2)
+        self.assertEqual(acquired, [first])
+        self.assertEqual(self.pool.stats()["waits"], 1)
+        self.pool.release(second)
+
+    def test_unusable_connection_is_replaced(self):
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.release(connection)
+
+        with mock.patch.object(self.pool, "is_usable", return_value=False):
+            replacement = self.pool.acquire(FakeConnection)
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.stats()["size"], 1)
+
+    def test_failed_reset_closes_connection(self):
+        connection = self.pool.acquire(FakeConnection)
+        with mock.patch.object(connection, "rollback", side_effect=RuntimeError):
+            self.pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.stats()["size"], 0)
+
+    def test_lost_connection_frees_its_slot(self):
+        self.pool.acquire(FakeConnection)
+        gc.collect()
+
+        self.assertEqual(self.pool.stats()["size"], 0)
+
+
+class MetricsRegistryTestCase(SimpleTestCase):
+    labels = ("TaskViewSet", "list", "GET", "200")
+
+    def observe(self, registry, duration, queries=0):
+        metrics = RequestMetrics()
+        metrics.queries = queries
+        metrics.add("render", 0.001)
+        registry.observe(self.labels, duration, metrics, size=100)
+
+    def test_histogram(self):
+        registry = MetricsRegistry()
+        for duration in (0.002, 0.005, 0.3, 20):
+            self.observe(registry, duration, queries=2)
+
+        text = render_prometheus(registry.snapshot())
+        labels = 'view="TaskViewSet",action="list",method="GET",status="200"'
+        for line in [
+            f"http_requests_total{{{labels}}} 4",
+            f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 2',
+            f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2',
+            f'http_request_duration_seconds_bucket{{{labels},le="0.5"}} 3',
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4',
+            f"http_request_duration_seconds_count{{{labels}}} 4",
+            f"http_request_db_queries_total{{{labels}}} 8",
+            f"http_request_response_bytes_total{{{labels}}} 400",
+        ]:
+            self.assertIn(line + "\n", text)
+
+    def test_workers_are_merged(self):
+        worker = MetricsRegistry()
+        self.observe(worker, 0.01)
+        with TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            write_series(os.path.join(directory, "metrics-1.json"), worker.snapshot())
+            write_series(os.path.join(directory, "metrics-2.json"), worker.snapshot())
+            self.assertEqual(collect()[self.labels]["count"], 2)
+
+            # An exited worker is folded into the archive, its requests are still counted.
+            archive_process(directory, 1)
+            archive_process(directory, 2)
+            self.assertEqual(sorted(os.listdir(directory)), ["metrics-archive.json"])
+            self.assertEqual(collect()[self.labels]["count"], 2)
+
+
+class QueryDetectorTestCase(SimpleTestCase):
+    def metrics(self, *statements, trace_after=0.0):
+        metrics = RequestMetrics(trace_after)
+        metrics.queries = len(statements)
+        metrics.statements = [(sql, 0.001) for sql in statements]
+        return metrics
+
+    def test_shape(self):
+        self.assertEqual(
+            shape("SELECT * FROM task WHERE id IN (%s, %s, %s) AND status = %s"),
+            "SELECT * FROM task WHERE id IN (%s...) AND status = %s",
+        )
+        self.assertEqual(
+            shape("INSERT INTO task (a, b) VALUES (%s, %s), (%s, %s)"),
+            "INSERT INTO task (a, b) VALUES (%s...)...",
+        )
+        self.assertEqual(
+            shape("INSERT INTO task (a) VALUES (%s)"),
+            shape("INSERT INTO task (a) VALUES (%s), (%s), (%s)"),
+        )
+
+    def test_repeated_shapes(self):
+        select = "SELECT * FROM user_task WHERE task_id IN ({})"
+        metrics = self.metrics(
+            select.format("%s"),
+            select.format("%s, %s"),
+            select.format("%s, %s, %s"),
+            "SAVEPOINT s1",
+            "SAVEPOINT s1",
+            "SAVEPOINT s1",
+        )
+        [repeated] = find_problems(metrics, None)["repeated"]
+        self.assertEqual(repeated["count"], 3)
+        self.assertEqual(find_problems(metrics, None, repeats_allowed=True), {})
+
+    def test_budget(self):
+        metrics = self.metrics("SELECT 1", "SELECT 2", "SELECT 3")
+        self.assertEqual(find_problems(metrics, 3), {})
+        problems = find_problems(metrics, 2)
+        self.assertEqual(problems, {"over_budget": {"queries": 3, "budget": 2}})
+
+        # Only the slow statements of requests that were not sampled are kept.
+        metrics.trace_after = 0.1
+        self.assertEqual(find_problems(metrics, 2), {})
+
+
+class StartupTestCase(TestCase):
+    def test_tasks_are_skipped_when_done(self):
+        self.assertEqual(startup.migrate(), "up to date")
+        with mock.patch.dict(os.environ, {"DJANGO_SUPERUSER_PASSWORD": "password"}):
+            self.assertEqual(startup.create_superuser("admin", "admin@example.com"), "created")
+            self.assertEqual(startup.create_superuser("admin", "admin@example.com"), "exists")
+
+        with TemporaryDirectory() as directory:
+            static_root = os.path.join(directory, "static")
+            with override_settings(STATIC_ROOT=static_root):
+                self.assertEqual(startup.collect_static(), "collected")
+                self.assertEqual(startup.collect_static(), "up to date")
+                with mock.patch.object(startup, "static_fingerprint", return_value="changed"):
+                    self.assertEqual(startup.collect_static(), "collected")
+
+    def test_api_docs_are_loaded_on_first_request(self):
+        response = self.client.get("/swagger.json/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("/api/v1/tasks/", loads(response.content)["paths"])
@@ -0,0 +1,55 @@
+from django.utils.functional import cached_property
+
+from .exceptions import BadRequestException
+
+
+class SparseFieldsViewMixin:
+    """`?fields=` and `?expand=` support for GET requests of DRF views.
+
+    `?fields=id,title` returns only those fields (and always `id`), and `?expand=` adds the
+    names in `expandable_fields`, which are left out when `fields` is given. Views load only
+    the columns of the requested fields with `only_requested_fields()` and check
+    `is_requested()` before prefetching an expandable field.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+    expandable_fields = []
+
+    @cached_property
+    def requested_fields(self):
+        """The requested serializer field names, or None for all of them."""
+        params = self.request.GET
+        if self.request.method != "GET" or not params.get(self.fields_query_param):
+            return None
+
+        fields = self.split_param(params.get(self.fields_query_param))
+        expand = self.split_param(params.get(self.expand_query_param, ""))
+        available = self.get_serializer_class()().fields
+        unknown = sorted(fields.difference(available) | expand.difference(self.expandable_fields))
+        if unknown:
+            raise BadRequestException(400007, f"Unknown fields: {', '.join(unknown)}")
+        return {"id", *fields, *expand}
+
+    @staticmethod
+    def split_param(value):
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    def is_requested(self, field):
+        return self.requested_fields is None or field in self.requested_fields
+
+    def only_requested_fields(self, queryset):
+        """Load only the model columns read by the requested fields and the ordering fields."""
+        if self.requested_fields is None:
+            return queryset
+
+        serializer_fields = self.get_serializer_class()().fields
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        sources = {serializer_fields[name].source for name in self.requested_fields}
+        ordering = columns.intersection(getattr(self, "ordering_fields", None) or [])
+        return queryset.only("id", *columns.intersection(sources), *ordering)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.requested_fields
+        return context
@@ -0,0 +1,163 @@
+"""Async-native employer task views for ASGI workers.
+
+DRF views are synchronous, so under ASGI every request to `EmployerTaskViewSet` is handed to
+a worker thread. These plain Django views serve the list, retrieve and assign paths with the
+async ORM instead and return the same payloads.
+"""
+
+from asgiref.sync import sync_to_async
+from json import loads
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.filters import OrderingFilter
+
+from helpers.encoders import fast_json_dumps
+from helpers.exceptions import (
+    AppException,
+    BadRequestException,
+    ForbiddenException,
+    NotFoundException,
+    ServerErrorException,
+    UnauthorizedException,
+)
+from helpers.filters import FilterBackend
+from helpers.metrics import timed
+from helpers.paginations import KeysetPagination
+from helpers.responses import AppResponse
+from helpers.views import SparseFieldsViewMixin
+from user.authentication import CachedTokenAuthentication
+from user.models import Users, UserTasks
+from user.permissions import EmployerPermission
+from .filters import TaskFilter
+from .models import Tasks
+from .serializers import TaskDetailSerializer, TaskLightSerializer
+from .views import TaskSearchMixin, add_assignments, get_user_id, is_light
+
+
+def json_response(data):
+    with timed("render"):
+        content = fast_json_dumps(data)
+    return HttpResponse(content, content_type="application/json")
+
+
+async def aprefetch_assignees(tasks):
+    """Async `TasksQuerySet.with_assignees` for loaded tasks, in a single query.
+
+    Django 4.2 does not support `prefetch_related()` with `aiterator()`, so the assignments are
+    put in the prefetch cache read by `task.users.all()` by hand.
+    """
+    assignments = {task.id: [] for task in tasks}
+    if not assignments:
+        return
+
+    queryset = Tasks.objects.assignees().filter(task_id__in=assignments)
+    async for assignment in queryset.aiterator():
+        assignments[assignment.task_id].append(assignment)
+
+    for task in tasks:
+        users = task.users.all()
+        users._result_cache = assignments[task.id]
+        users._prefetch_done = True
+        task._prefetched_objects_cache = {"users": users}
+
+
+class AsyncAPIView(View):
+    """Token authentication, permission checks and `AppException` responses for async views."""
+
+    authentication = CachedTokenAuthentication()
+    permission_classes = [EmployerPermission]
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            for permission_class in self.permission_classes:
+                permission = permission_class()
+                if not await permission.ahas_permission(request, self):
+                    raise ForbiddenException(403001, permission.message)
+
+            # Read by the DRF helpers shared with the sync views.
+            request.query_params = request.GET
+            return await super().dispatch(request, *args, **kwargs)
+        except AppException as exc:
+            return exc.resp
+        except Exception as exc:
+            if settings.DEBUG:
+                raise
+            return ServerErrorException(500005, error=exc, request=request).resp
+
+    async def authenticate(self, request):
+        try:
+            result = await self.authentication.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            raise UnauthorizedException(401001, str(exc.detail))
+        if result is None:
+            raise UnauthorizedException(401001, "Authentication credentials were not provided.")
+        return result[0]
+
+    @staticmethod
+    def get_data(request):
+        if request.content_type != "application/json":
+            return request.POST
+        try:
+            data = loads(request.body or b"{}")
+        except ValueError:
+            raise BadRequestException(400006, "Invalid JSON body")
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    async def get_task(pk, queryset=None):
+        queryset = Tasks.objects.all() if queryset is None else queryset
+        task = await queryset.filter(pk=pk).afirst()
+        if task is None:
+            raise NotFoundException(404001, "Task not found")
+        return task
+
+
+class AsyncTaskReadView(TaskSearchMixin, SparseFieldsViewMixin, AsyncAPIView):
+    ordering_fields = ["_created", "due_date"]
+    expandable_fields = ["users"]
+    query_budgets = {"get": 4}
+
+    def get_serializer_class(self):
+        return TaskLightSerializer if is_light(self.request) else TaskDetailSerializer
+
+    async def serialize(self, tasks, many=False):
+        if not is_light(self.request) and self.is_requested("users"):
+            await aprefetch_assignees(tasks if many else [tasks])
+        context = {"fields": self.requested_fields}
+        return self.get_serializer_class()(tasks, many=many, context=context).data
+
+
+class AsyncTaskListView(AsyncTaskReadView):
+    filter_backends = [FilterBackend, OrderingFilter]
+    filterset_class = TaskFilter
+
+    async def get(self, request):
+        queryset = FilterBackend().filter_queryset(request, Tasks.objects.all(), self)
+        queryset = self.search(queryset)
+        queryset = self.only_requested_fields(queryset)
+        paginator = KeysetPagination()
+        tasks = await paginator.apaginate_queryset(queryset, request, self)
+        data = await self.serialize(tasks, many=True)
+        return json_response(paginator.get_paginated_response(data).data)
+
+
+class AsyncTaskDetailView(AsyncTaskReadView):
+    async def get(self, request, pk):
+        task = await self.get_task(pk, self.only_requested_fields(Tasks.objects.all()))
+        return json_response(await self.serialize(task))
+
+
+class AsyncTaskAssignView(AsyncAPIView):
+    async def post(self, request, pk):
+        task = await self.get_task(pk)
+        user_id = get_user_id(self.get_data(request))
+        if not await Users.objects.filter(id=user_id).aexists():
+            raise BadRequestException(400004, "User is required")
+
+        # Transactions are sync only in Django 4.2.
+        await sync_to_async(add_assignments)([UserTasks(user_id=user_id, task_id=task.id)])
+        return AppResponse("Task assigned successfully")
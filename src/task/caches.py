@@ -0,0 +1,48 @@
+from functools import partial
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_cache():
+    alias = settings.MY_TASKS_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def get_version_key(user_id):
+    return f"my-tasks-version:{user_id}"
+
+
+def get_version(user_id) -> str:
+    """The version of `user_id`'s task list; it changes whenever one of their tasks does."""
+    cache = get_cache()
+    if cache is None:
+        return ""
+
+    key = get_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key, "")
+    return version
+
+
+def _set_versions(cache, user_ids):
+    cache.set_many({get_version_key(user_id): uuid4().hex for user_id in user_ids}, None)
+
+
+def bump_versions(user_ids):
+    """Invalidate the cached task lists of `user_ids`.
+
+    The versions change again once the transaction commits, so a list cached from a
+    concurrent read of the old rows is not served afterwards.
+    """
+    cache = get_cache()
+    user_ids = set(user_ids)
+    if cache is None or not user_ids:
+        return
+
+    _set_versions(cache, user_ids)
+    transaction.on_commit(partial(_set_versions, cache, user_ids))
@@ -0,0 +1,46 @@
+import csv
+
+from django.conf import settings
+
+from helpers.encoders import fast_json_dumps
+
+EXPORT_FIELDS = ["id", "title", "description", "status", "due_date", "_created", "_updated"]
+
+
+class Echo:
+    """File-like object that returns what is written, so `csv.writer` rows can be streamed."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """Yield one flat dict per task, reading the database in server-side cursor chunks."""
+    queryset = queryset.prefetch_related(None).only(*EXPORT_FIELDS, "assignee_ids")
+    if not queryset.ordered:
+        queryset = queryset.order_by("id")
+
+    for task in queryset.iterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE):
+        row = {field: getattr(task, field) for field in EXPORT_FIELDS}
+        row["assignees"] = task.assignee_ids
+        yield row
+
+
+def ndjson_stream(rows):
+    for row in rows:
+        yield fast_json_dumps(row) + b"\n"
+
+
+def csv_stream(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([*EXPORT_FIELDS, "assignees"])
+    for row in rows:
+        values = [row[field] for field in EXPORT_FIELDS]
+        values = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+        yield writer.writerow([*values, " ".join(map(str, row["assignees"]))])
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson_stream),
+    "csv": ("text/csv", csv_stream),
+}
@@ -0,0 +1,39 @@
+from django_filters import rest_framework as filters
+
+from django import forms
+
+from .models import Tasks, TasksQuerySet
+
+
+class IntegerInFilter(filters.BaseInFilter, filters.NumberFilter):
+    field_class = forms.IntegerField
+
+
+class TaskFilter(filters.FilterSet):
+    """Filters of the task lists, each served by an index of `task` or `user_task`.
+
+    List values are comma separated (`?status=1,2`, `?assignee=3,4`) and ranges take
+    `_after` and `_before` ISO 8601 bounds (`?due_date_after=2024-01-01T00:00:00Z`).
+    """
+
+    status = IntegerInFilter(field_name="status")
+    assignee = IntegerInFilter(method="filter_assignee")
+    due_date = filters.IsoDateTimeFromToRangeFilter(field_name="due_date")
+    created = filters.IsoDateTimeFromToRangeFilter(field_name="_created")
+    overdue = filters.BooleanFilter(method="filter_overdue")
+    unassigned = filters.BooleanFilter(method="filter_unassigned")
+
+    class Meta:
+        model = Tasks
+        fields = []
+
+    def filter_assignee(self, queryset, name, value):
+        return queryset.assigned_to_any(value)
+
+    def filter_overdue(self, queryset, name, value):
+        overdue = TasksQuerySet.overdue_filter()
+        return queryset.filter(overdue) if value else queryset.exclude(overdue)
+
+    def filter_unassigned(self, queryset, name, value):
+        unassigned = TasksQuerySet.unassigned_filter()
+        return queryset.filter(unassigned) if value else queryset.exclude(unassigned)
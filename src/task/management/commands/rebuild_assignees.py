@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from task.models import Tasks
+from user.models import UserTasks
+
+
+class Command(BaseCommand):
+    help = "Verify and rebuild the denormalized assignee_count and assignee_ids of tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report out of date tasks, and exit with an error if there are any.",
+        )
+        parser.add_argument("--batch-size", type=int, default=settings.TASK_BULK_BATCH_SIZE)
+
+    def handle(self, *args, check=False, batch_size=500, **options):
+        checked, stale = 0, []
+        for batch in self.batches(batch_size):
+            stale.extend(self.stale_ids(batch))
+            checked += len(batch)
+
+        if stale and not check:
+            for start in range(0, len(stale), batch_size):
+                Tasks.objects.filter(id__in=stale[start : start + batch_size]).refresh_assignees()
+
+        self.stdout.write(f"Checked {checked} tasks, {len(stale)} out of date.")
+        if stale and check:
+            raise CommandError(f"Out of date tasks: {stale[:20]}{'...' if len(stale) > 20 else ''}")
+        if stale:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(stale)} tasks."))
+
+    @staticmethod
+    def batches(batch_size):
+        last_id = 0
+        while True:
+            batch = list(
+                Tasks.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "assignee_count", "assignee_ids")[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1][0]
+
+    @staticmethod
+    def stale_ids(batch):
+        assignee_ids = {task_id: [] for task_id, _, _ in batch}
+        assignments = (
+            UserTasks.objects.filter(task__in=assignee_ids)
+            .order_by("user_id")
+            .values_list("task_id", "user_id")
+        )
+        for task_id, user_id in assignments:
+            assignee_ids[task_id].append(user_id)
+
+        return [
+            task_id
+            for task_id, count, ids in batch
+            if ids != assignee_ids[task_id] or count != len(assignee_ids[task_id])
+        ]
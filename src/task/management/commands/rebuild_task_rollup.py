@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task.models import TaskRollup
+
+
+class Command(BaseCommand):
+    help = "Verify and rebuild the per assignee and status task counts of task_rollup."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report out of date groups, and exit with an error if there are any.",
+        )
+
+    def handle(self, *args, check=False, **options):
+        expected = TaskRollup.objects.recount()
+        rows = TaskRollup.objects.filter(count__gt=0).values_list("user_id", "status", "count")
+        current = {(user_id, status): count for user_id, status, count in rows}
+        stale = sorted(
+            group
+            for group in expected.keys() | current.keys()
+            if expected.get(group) != current.get(group)
+        )
+
+        self.stdout.write(f"Checked {len(expected)} groups, {len(stale)} out of date.")
+        if stale and check:
+            raise CommandError(f"Out of date: {stale[:20]}{'...' if len(stale) > 20 else ''}")
+        if stale and not check:
+            TaskRollup.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(stale)} groups."))
@@ -0,0 +1,100 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from task.models import TaskRollup, Tasks
+from user.enums import UserRole
+from user.models import Users, UserTasks
+
+# Searchable words of the generated titles and descriptions.
+WORDS = (
+    "report invoice review deploy meeting budget design release customer backup audit "
+    "migration onboarding security payroll support"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Create users and tasks with random assignments, for benchmarks and local testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employers", type=int, default=5)
+        parser.add_argument("--employees", type=int, default=100)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument(
+            "--fanout", type=int, default=2, help="Assignees per task, 0 leaves them unassigned."
+        )
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Usernames are <prefix>-employer-<n> and <prefix>-employee-<n>.",
+        )
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if Users.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users named {prefix}-* exist, pick another --prefix.")
+        if options["fanout"] > options["employees"]:
+            raise CommandError("--fanout can not be larger than --employees.")
+
+        rng = random.Random(options["seed"])
+        password = make_password(options["password"])
+        employers = self.create_users(
+            f"{prefix}-employer", options["employers"], UserRole.EMPLOYER, password
+        )
+        employees = self.create_users(
+            f"{prefix}-employee", options["employees"], UserRole.EMPLOYEE, password
+        )
+
+        employee_ids = [user.id for user in employees]
+        fanout, batch_size = options["fanout"], options["batch_size"]
+        assignments = 0
+        for start in range(0, options["tasks"], batch_size):
+            size = min(batch_size, options["tasks"] - start)
+            tasks = [self.make_task(rng, start + i, employee_ids, fanout) for i in range(size)]
+            with transaction.atomic():
+                Tasks.objects.bulk_create(tasks)
+                links = [
+                    UserTasks(user_id=user_id, task_id=task.id)
+                    for task in tasks
+                    for user_id in task.assignee_ids
+                ]
+                UserTasks.objects.bulk_create(links, batch_size=batch_size)
+                TaskRollup.objects.apply([], [(task.status, task.assignee_ids) for task in tasks])
+            assignments += len(links)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(employers)} employers, {len(employees)} employees, "
+                f"{options['tasks']} tasks and {assignments} assignments."
+            )
+        )
+
+    @staticmethod
+    def create_users(prefix, count, role, password):
+        return Users.objects.bulk_create(
+            Users(username=f"{prefix}-{i}", password=password, role=role.value)
+            for i in range(count)
+        )
+
+    @staticmethod
+    def make_task(rng, number, employee_ids, fanout):
+        # About one task in ten has no due date, and one in ten is past due.
+        due_date = None
+        if rng.random() >= 0.1:
+            due_date = timezone.now() + timedelta(hours=rng.randint(-500, 4500))
+        assignee_ids = sorted(rng.sample(employee_ids, fanout))
+        return Tasks(
+            title=f"{rng.choice(WORDS).capitalize()} {number}",
+            description=" ".join(rng.choices(WORDS, k=8)),
+            status=rng.choice([1, 2]),
+            due_date=due_date,
+            assignee_count=len(assignee_ids),
+            assignee_ids=assignee_ids,
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+from helpers.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="tasks",
+            index=models.Index(fields=["_created", "id"], name="task_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="tasks",
+            index=models.Index(fields=["due_date", "id"], name="task_due_date_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="tasks",
+            index=models.Index(
+                fields=["status", "_created", "id"], name="task_status_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="tasks",
+            index=models.Index(
+                condition=models.Q(("status", 1)),
+                fields=["due_date", "id"],
+                name="task_open_due_date_idx",
+            ),
+        ),
+    ]
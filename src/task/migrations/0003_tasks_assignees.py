@@ -0,0 +1,40 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+def fill_assignees(apps, schema_editor):
+    Tasks = apps.get_model("task", "Tasks")
+    UserTasks = apps.get_model("user", "UserTasks")
+
+    assignee_ids = {}
+    for task_id, user_id in UserTasks.objects.order_by("user_id").values_list("task_id", "user_id"):
+        assignee_ids.setdefault(task_id, []).append(user_id)
+
+    tasks = list(Tasks.objects.filter(id__in=assignee_ids).only("id"))
+    for task in tasks:
+        task.assignee_ids = assignee_ids[task.id]
+        task.assignee_count = len(task.assignee_ids)
+    Tasks.objects.bulk_update(tasks, ["assignee_count", "assignee_ids"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0002_task_list_indexes"),
+        ("user", "0002_usertasks_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tasks",
+            name="assignee_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tasks",
+            name="assignee_ids",
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(fill_assignees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:43
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# `search_vector` is computed by triggers so that every write path (save, bulk_create,
+# bulk_update, update) keeps it current; the update trigger only fires when the title or the
+# description changes. Other databases search with LIKE and leave the column empty.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce({row}.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}.description, '')), 'B')"
+)
+
+CREATE_SEARCH_VECTOR = f"""
+CREATE FUNCTION task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row="NEW")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER task_search_vector_insert BEFORE INSERT ON task
+    FOR EACH ROW EXECUTE PROCEDURE task_search_vector_update();
+
+CREATE TRIGGER task_search_vector_update BEFORE UPDATE OF title, description ON task
+    FOR EACH ROW
+    WHEN (
+        OLD.title IS DISTINCT FROM NEW.title
+        OR OLD.description IS DISTINCT FROM NEW.description
+    )
+    EXECUTE PROCEDURE task_search_vector_update();
+
+UPDATE task SET search_vector = {SEARCH_VECTOR.format(row="task")};
+
+CREATE INDEX task_search_vector_idx ON task USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR = """
+DROP INDEX IF EXISTS task_search_vector_idx;
+DROP TRIGGER IF EXISTS task_search_vector_update ON task;
+DROP TRIGGER IF EXISTS task_search_vector_insert ON task;
+DROP FUNCTION IF EXISTS task_search_vector_update();
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SEARCH_VECTOR)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0003_tasks_assignees"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tasks",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+from helpers.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("task", "0004_tasks_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="tasks",
+            index=models.Index(
+                condition=models.Q(("assignee_count", 0)),
+                fields=["_created", "id"],
+                name="task_unassigned_created_idx",
+            ),
+        ),
+    ]
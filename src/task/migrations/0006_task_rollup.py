@@ -0,0 +1,37 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0005_task_unassigned_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("status", models.SmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "task_rollup",
+                "managed": True,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="taskrollup",
+            constraint=models.UniqueConstraint(
+                fields=("user_id", "status"), name="task_rollup_unique"
+            ),
+        ),
+    ]
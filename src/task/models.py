@@ -1,7 +1,129 @@
-from django.db import models
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import reduce
+from operator import add, and_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models.functions import Cast
+from django.utils import timezone
 
 from helpers.models import TrackingModel
 from task.enums import TaskStatus
+from user.models import UserTasks
+
+# Deltas collected by `TaskRollupQuerySet.batch`.
+rollup_batch = ContextVar("rollup_batch", default=None)
+
+
+class TasksQuerySet(models.QuerySet):
+    def assigned_to(self, user):
+        """Tasks assigned to `user`, filtered with EXISTS so each task is returned once."""
+        return self.assigned_to_any([user])
+
+    def assigned_to_any(self, users):
+        """Tasks assigned to any of `users` (instances or ids), each returned once."""
+        assignments = UserTasks.objects.filter(task=models.OuterRef("pk"), user__in=users)
+        return self.filter(models.Exists(assignments))
+
+    def search(self, terms):
+        """Tasks matching the words of `terms`, annotated with a `rank` (higher is better).
+
+        PostgreSQL matches `search_vector` with web search syntax (quoted phrases, `or`,
+        `-word`); other databases match every word in the title or description with LIKE and
+        rank by the number of words found in the title.
+        """
+        if connections[self.db].vendor == "postgresql":
+            query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+            # float8, so the rank survives the round trip through a pagination cursor.
+            rank = Cast(SearchRank(models.F("search_vector"), query), models.FloatField())
+            return self.filter(search_vector=query).annotate(rank=rank)
+
+        words = terms.split()
+        matches = [
+            models.Q(title__icontains=word) | models.Q(description__icontains=word)
+            for word in words
+        ]
+        title_matches = [
+            models.Case(
+                models.When(title__icontains=word, then=models.Value(1.0)),
+                default=models.Value(0.0),
+            )
+            for word in words
+        ]
+        rank = Cast(reduce(add, title_matches), models.FloatField())
+        return self.filter(reduce(and_, matches)).annotate(rank=rank)
+
+    @staticmethod
+    def overdue_filter():
+        """In progress tasks past their due date, served by `task_open_due_date_idx`."""
+        return models.Q(status=TaskStatus.IN_PROGRESS.value, due_date__lt=timezone.now())
+
+    @staticmethod
+    def unassigned_filter():
+        """Tasks without assignees, served by `task_unassigned_created_idx`."""
+        return models.Q(assignee_count=0)
+
+    @staticmethod
+    def assignees():
+        """The assignment rows read by `TaskDetailSerializer`, with only the fields it uses."""
+        return (
+            UserTasks.objects.select_related("user")
+            .only("task", "user", "user__username", "user__role")
+            .order_by("id")
+        )
+
+    def with_assignees(self):
+        """Prefetch the assignees read by `TaskDetailSerializer` in a single query."""
+        return self.prefetch_related(models.Prefetch("users", queryset=self.assignees()))
+
+    def refresh_assignees(self):
+        """Recompute `assignee_count` and `assignee_ids` of these tasks from `UserTasks`.
+
+        Called in the transaction that changes the assignments. The task rows are locked
+        first, so concurrent changes to the assignees of a task are applied one at a time.
+        """
+        with transaction.atomic(savepoint=False):
+            tasks = list(
+                self.select_for_update().order_by("id").only("id", "status", "assignee_ids")
+            )
+            assignee_ids = {task.id: [] for task in tasks}
+            if not assignee_ids:
+                return
+            old_rows = [(task.status, task.assignee_ids) for task in tasks]
+
+            assignments = (
+                UserTasks.objects.filter(task__in=assignee_ids)
+                .order_by("user_id")
+                .values_list("task_id", "user_id")
+            )
+            for task_id, user_id in assignments:
+                assignee_ids[task_id].append(user_id)
+
+            for task in tasks:
+                task.assignee_ids = assignee_ids[task.id]
+                task.assignee_count = len(task.assignee_ids)
+            Tasks.objects.bulk_update(
+                tasks, DENORMALIZED_FIELDS, batch_size=settings.TASK_BULK_BATCH_SIZE
+            )
+            TaskRollup.objects.apply(old_rows, [(task.status, task.assignee_ids) for task in tasks])
+
+
+# Maintained by `TasksQuerySet.refresh_assignees` only.
+DENORMALIZED_FIELDS = ["assignee_count", "assignee_ids"]
+# Not written by `Tasks.save`; `search_vector` is maintained by database triggers on
+# PostgreSQL, see migration 0004_tasks_search_vector.
+READ_ONLY_FIELDS = [*DENORMALIZED_FIELDS, "search_vector"]
+# Text search configuration of `search_vector`.
+SEARCH_CONFIG = "english"
+
+
+class TasksManager(models.Manager.from_queryset(TasksQuerySet)):
+    def get_queryset(self):
+        # Only read by the database.
+        return super().get_queryset().defer("search_vector")
 
 
 class Tasks(TrackingModel):
@@ -17,6 +139,163 @@ class Tasks(TrackingModel):
 
     due_date = models.DateTimeField(null=True, blank=True)
 
+    # Copies of the `UserTasks` of the task, so lists can show assignees without a join.
+    assignee_count = models.PositiveIntegerField(default=0)
+    assignee_ids = models.JSONField(default=list)
+
+    # Weighted title (A) and description (B) lexemes, GIN indexed on PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TasksManager()
+
     class Meta:
         managed = True
         db_table = "task"
+        indexes = [
+            models.Index(fields=["_created", "id"], name="task_created_idx"),
+            models.Index(fields=["due_date", "id"], name="task_due_date_idx"),
+            models.Index(fields=["status", "_created", "id"], name="task_status_created_idx"),
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(status=TaskStatus.IN_PROGRESS.value),
+                name="task_open_due_date_idx",
+            ),
+            models.Index(
+                fields=["_created", "id"],
+                condition=models.Q(assignee_count=0),
+                name="task_unassigned_created_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Never write back denormalized values that may have changed since the task was loaded.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in READ_ONLY_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class TaskRollupQuerySet(models.QuerySet):
+    def apply(self, old_rows, new_rows):
+        """Move the counts of tasks from their `old_rows` to their `new_rows` groups.
+
+        Rows are `(status, assignee_ids)` pairs; pass no old row for a created task and no
+        new row for a deleted one. Does nothing unless `settings.TASK_STATS_ROLLUP` is set.
+        """
+        if not settings.TASK_STATS_ROLLUP:
+            return
+
+        batch = rollup_batch.get()
+        deltas = Counter() if batch is None else batch
+        for row in new_rows:
+            deltas.update(TaskRollup.groups(*row))
+        for row in old_rows:
+            deltas.subtract(TaskRollup.groups(*row))
+        if batch is None:
+            self.add_deltas(deltas)
+
+    @contextmanager
+    def batch(self):
+        """Collect the `apply` calls of the block, such as the `post_delete` signal of every
+        deleted task, into one upsert run at its end. Use it inside the transaction."""
+        if rollup_batch.get() is not None:
+            yield
+            return
+
+        deltas = Counter()
+        token = rollup_batch.set(deltas)
+        try:
+            yield
+        finally:
+            rollup_batch.reset(token)
+        self.add_deltas(deltas)
+
+    def add_deltas(self, deltas):
+        """Add the `{(user_id, status): delta}` of `deltas` to the counts."""
+        # Sorted, so concurrent writers lock the rollup rows in the same order.
+        values = [(*group, delta) for group, delta in sorted(deltas.items()) if delta]
+        if not values:
+            return
+
+        connection = connections[self.db]
+        table = connection.ops.quote_name(TaskRollup._meta.db_table)
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(values))
+        # An upsert that adds to the current count, supported by PostgreSQL and SQLite.
+        sql = (
+            f"INSERT INTO {table} (user_id, status, count) VALUES {placeholders} "
+            f"ON CONFLICT (user_id, status) DO UPDATE SET count = {table}.count + EXCLUDED.count"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in values for value in row])
+
+    def recount(self):
+        """`{(user_id, status): count}` of the non-empty groups, from `Tasks` and `UserTasks`."""
+        counts = {}
+        for status, count, unassigned in (
+            Tasks.objects.values_list("status")
+            .annotate(
+                count=models.Count("id"),
+                unassigned=models.Count("id", filter=TasksQuerySet.unassigned_filter()),
+            )
+            .order_by()
+        ):
+            counts[TaskRollup.ALL_TASKS, status] = count
+            counts[TaskRollup.UNASSIGNED, status] = unassigned
+        for user_id, status, count in (
+            UserTasks.objects.values_list("user_id", "task__status")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        ):
+            counts[user_id, status] = count
+        return {group: count for group, count in counts.items() if count}
+
+    def rebuild(self):
+        """Replace the rollup with `recount()`, e.g. after enabling `TASK_STATS_ROLLUP`."""
+        counts = self.recount()
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                [
+                    TaskRollup(user_id=user_id, status=status, count=count)
+                    for (user_id, status), count in sorted(counts.items())
+                ],
+                batch_size=settings.TASK_BULK_BATCH_SIZE,
+            )
+
+
+class TaskRollup(models.Model):
+    """Number of tasks per assignee and status, read by the stats of `EmployerTaskViewSet`.
+
+    Kept up to date in the transactions that write `Tasks` and `UserTasks` when
+    `settings.TASK_STATS_ROLLUP` is set; `manage.py rebuild_task_rollup` recounts it.
+    """
+
+    # Pseudo assignees of the rows that count every task and the unassigned tasks.
+    ALL_TASKS = 0
+    UNASSIGNED = -1
+
+    user_id = models.BigIntegerField()
+    status = models.SmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = TaskRollupQuerySet.as_manager()
+
+    class Meta:
+        managed = True
+        db_table = "task_rollup"
+        constraints = [
+            models.UniqueConstraint(fields=["user_id", "status"], name="task_rollup_unique"),
+        ]
+
+    @classmethod
+    def groups(cls, status, assignee_ids):
+        """The `(user_id, status)` groups a task with `status` and `assignee_ids` counts in."""
+        if not assignee_ids:
+            return [(cls.ALL_TASKS, status), (cls.UNASSIGNED, status)]
+        return [(cls.ALL_TASKS, status), *((user_id, status) for user_id in assignee_ids)]
@@ -1,13 +1,22 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
 
+from helpers.functions import chunks
+from helpers.metrics import timed
+from helpers.serializers import SparseFieldsSerializerMixin, TimedDataMixin, TimedListSerializer
 from user.models import Users, UserTasks
-from .models import Tasks
+from .caches import bump_versions
+from .models import TaskRollup, Tasks
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedDataMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tasks
         fields = ["id", "title", "description", "status", "due_date", "_created", "_updated"]
+        list_serializer_class = TimedListSerializer
 
 
 class UserInTaskSerializer(serializers.ModelSerializer):
@@ -24,7 +33,55 @@ class UserTaskSerializer(serializers.ModelSerializer):
         fields = ["user"]
 
 
-class TaskDetailSerializer(serializers.ModelSerializer):
+class TaskBulkListSerializer(TimedListSerializer):
+    """Validates tasks one by one and writes them with bulk queries.
+
+    Each chunk of `settings.TASK_BULK_BATCH_SIZE` tasks is written in its own transaction.
+    """
+
+    def validate_items(self):
+        """Return a `(validated_data, errors)` pair for every item of `initial_data`."""
+        results = []
+        for item in self.initial_data:
+            try:
+                results.append((self.child.run_validation(item), None))
+            except serializers.ValidationError as exc:
+                results.append((None, exc.detail))
+        return results
+
+    def create(self, validated_data):
+        tasks = [Tasks(**attrs) for attrs in validated_data]
+        for chunk in chunks(tasks, settings.TASK_BULK_BATCH_SIZE):
+            with transaction.atomic():
+                Tasks.objects.bulk_create(chunk)
+                TaskRollup.objects.apply([], [(task.status, task.assignee_ids) for task in chunk])
+        return tasks
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        fields = {"_updated"}
+        old_rows = {task.id: (task.status, task.assignee_ids) for task in instances}
+        for task, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            task._updated = now
+            fields.update(attrs)
+
+        for chunk in chunks(instances, settings.TASK_BULK_BATCH_SIZE):
+            with transaction.atomic():
+                Tasks.objects.bulk_update(chunk, sorted(fields))
+                TaskRollup.objects.apply(
+                    [old_rows[task.id] for task in chunk],
+                    [(task.status, task.assignee_ids) for task in chunk],
+                )
+                assignees = UserTasks.objects.filter(task__in=chunk).values_list("user_id")
+                bump_versions(user_id for (user_id,) in assignees)
+        return instances
+
+
+class TaskDetailSerializer(
+    TimedDataMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     users = UserTaskSerializer(many=True, read_only=True)
 
     class Meta:
@@ -39,3 +96,103 @@ class TaskDetailSerializer(serializers.ModelSerializer):
             "_created",
             "_updated",
         ]
+        list_serializer_class = TaskBulkListSerializer
+
+
+class TaskLightSerializer(TimedDataMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """`TaskDetailSerializer` with the assignees read from the denormalized columns of the task."""
+
+    class Meta:
+        model = Tasks
+        fields = [
+            "id",
+            "title",
+            "description",
+            "status",
+            "assignee_count",
+            "assignee_ids",
+            "due_date",
+            "_created",
+            "_updated",
+        ]
+        read_only_fields = ["assignee_count", "assignee_ids"]
+        list_serializer_class = TimedListSerializer
+
+
+class FastTaskListSerializer:
+    """Read-only `TaskDetailSerializer(many=True)` output built without serializer instances.
+
+    Tasks are read with `values()`, the assignees of a whole page with one `values_list()`
+    query grouped in a single pass, and the output dicts are built directly. It also works
+    with `TaskLightSerializer` and the `fields` context of `SparseFieldsSerializerMixin`.
+    """
+
+    assignee_fields = ("task_id", "user_id", "user__username", "user__role")
+
+    def __init__(self, serializer_class=TaskDetailSerializer, fields=None):
+        self.fields = serializer_class(context={"fields": fields}).fields
+        self.with_users = "users" in self.fields
+        self.columns = [field.source for name, field in self.fields.items() if name != "users"]
+
+    def values(self, queryset, *extra):
+        """The `values()` rows read by `to_representation`, plus the `extra` columns."""
+        return queryset.prefetch_related(None).values("id", *self.columns, *extra)
+
+    def to_representation(self, rows):
+        users = self.get_users([row["id"] for row in rows]) if self.with_users else {}
+        # (output name, column or None for the assignees, converter or None to copy the value)
+        fields = [
+            (name, None, None) if name == "users" else (name, field.source, self.converter(field))
+            for name, field in self.fields.items()
+        ]
+
+        data = []
+        with timed("serialize"):
+            for row in rows:
+                item = {}
+                for name, column, convert in fields:
+                    value = users[row["id"]] if column is None else row[column]
+                    item[name] = value if convert is None else convert(value)
+                data.append(item)
+        return data
+
+    @staticmethod
+    def converter(field):
+        """Replaces `field.to_representation`, None when the database value is returned as is."""
+        if not isinstance(field, serializers.DateTimeField):
+            return None
+
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        tz = field.default_timezone()
+
+        def convert(value):
+            if not value:
+                return None
+            value = (value.astimezone(tz) if tz is not None else value).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return convert
+
+    def get_users(self, task_ids):
+        users = {task_id: [] for task_id in task_ids}
+        assignees = Tasks.objects.assignees().filter(task__in=task_ids)
+        for task_id, user_id, username, role in assignees.values_list(*self.assignee_fields):
+            users[task_id].append({"user": {"id": user_id, "username": username, "role": role}})
+        return users
+
+
+class TaskAssignmentSerializer(serializers.Serializer):
+    task = serializers.IntegerField()
+    user = serializers.IntegerField(required=False)
+    users = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        users = attrs.get("users", [])
+        if "user" in attrs:
+            users = [attrs["user"], *users]
+        if not users:
+            raise serializers.ValidationError("Either user or users is required.")
+        return {"task": attrs["task"], "users": list(dict.fromkeys(users))}
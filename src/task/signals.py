@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from user.models import UserTasks
+from .caches import bump_versions
+from .models import TaskRollup, Tasks
+
+
+@receiver(post_save, sender=Tasks)
+def bump_task_assignee_versions(sender, instance, created, **kwargs):
+    if not created:
+        bump_versions(UserTasks.objects.filter(task=instance).values_list("user_id", flat=True))
+
+
+# Deleting a task cascades to its `UserTasks`, which bumps every assignee.
+@receiver([post_save, post_delete], sender=UserTasks)
+def bump_assignee_version(sender, instance, **kwargs):
+    bump_versions([instance.user_id])
+
+
+# `bulk_create` sends no signals, its callers refresh the tasks themselves.
+@receiver([post_save, post_delete], sender=UserTasks)
+def refresh_task_assignees(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Tasks) or getattr(origin, "model", None) is Tasks:
+        return  # The task is being deleted too.
+    Tasks.objects.filter(id=instance.task_id).refresh_assignees()
+
+
+# `bulk_create` and `bulk_update` of tasks send no signals, `TaskBulkListSerializer` and
+# `refresh_assignees` update the rollup themselves.
+@receiver(pre_save, sender=Tasks)
+def read_task_rollup_row(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_row = None
+    if not settings.TASK_STATS_ROLLUP or instance._state.adding:
+        return
+    if update_fields is None or "status" in update_fields:
+        rows = Tasks.objects.filter(pk=instance.pk).values_list("status", "assignee_ids")
+        instance._rollup_row = rows.first()
+
+
+@receiver(post_save, sender=Tasks)
+def update_task_rollup(sender, instance, created, **kwargs):
+    if created:
+        TaskRollup.objects.apply([], [(instance.status, instance.assignee_ids)])
+    elif getattr(instance, "_rollup_row", None) is not None:
+        _, assignee_ids = instance._rollup_row
+        TaskRollup.objects.apply([instance._rollup_row], [(instance.status, assignee_ids)])
+
+
+@receiver(post_delete, sender=Tasks)
+def remove_task_rollup(sender, instance, **kwargs):
+    TaskRollup.objects.apply([(instance.status, instance.assignee_ids)], [])
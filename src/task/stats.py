@@ -0,0 +1,82 @@
+from django.db.models import Count
+
+from user.models import UserTasks
+from .enums import TaskStatus
+from .models import TaskRollup, Tasks, TasksQuerySet
+
+STATUS_NAMES = {status.value: status.name.lower() for status in TaskStatus}
+
+
+def count_by_status(counts):
+    """`{status name: count}` of every status from `(status, count)` pairs."""
+    result = dict.fromkeys(STATUS_NAMES.values(), 0)
+    for status, count in counts:
+        result[STATUS_NAMES[status]] += count
+    return result
+
+
+def build_stats(status_counts, assignee_counts, overdue, unassigned):
+    """The stats payload from `(status, count)` pairs and `(user_id, status, count)` rows."""
+    by_assignee = {}
+    for user_id, status, count in assignee_counts:
+        by_assignee.setdefault(user_id, []).append((status, count))
+
+    by_status = count_by_status(status_counts)
+    assignees = []
+    for user_id, counts in sorted(by_assignee.items()):
+        counts = count_by_status(counts)
+        assignees.append({"user": user_id, "total": sum(counts.values()), **counts})
+
+    return {
+        "total": sum(by_status.values()),
+        "overdue": overdue,
+        "unassigned": unassigned,
+        "status": by_status,
+        "assignees": assignees,
+    }
+
+
+def count_tasks(queryset):
+    """Stats of `queryset` with one GROUP BY query on `task` and one on `user_task`."""
+    rows = list(
+        queryset.order_by()
+        .values_list("status")
+        .annotate(
+            count=Count("id"),
+            overdue=Count("id", filter=TasksQuerySet.overdue_filter()),
+            unassigned=Count("id", filter=TasksQuerySet.unassigned_filter()),
+        )
+    )
+    assignee_counts = (
+        UserTasks.objects.filter(task__in=queryset.order_by().values("id"))
+        .order_by()
+        .values_list("user_id", "task__status")
+        .annotate(count=Count("id"))
+    )
+    return build_stats(
+        [(status, count) for status, count, _, _ in rows],
+        assignee_counts,
+        overdue=sum(overdue for _, _, overdue, _ in rows),
+        unassigned=sum(unassigned for _, _, _, unassigned in rows),
+    )
+
+
+def read_rollup():
+    """Stats of every task from `TaskRollup`, in time proportional to the number of groups.
+
+    Overdue tasks depend on the time rather than on writes, they are counted from
+    `task_open_due_date_idx`.
+    """
+    status_counts, assignee_counts, unassigned = [], [], 0
+    for user_id, status, count in TaskRollup.objects.filter(count__gt=0).values_list(
+        "user_id", "status", "count"
+    ):
+        if user_id == TaskRollup.ALL_TASKS:
+            status_counts.append((status, count))
+        elif user_id == TaskRollup.UNASSIGNED:
+            unassigned += count
+        else:
+            assignee_counts.append((user_id, status, count))
+
+    overdue = Tasks.objects.filter(TasksQuerySet.overdue_filter()).count()
+    return build_stats(status_counts, assignee_counts, overdue, unassigned)
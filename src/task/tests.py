@@ -1,3 +1,1051 @@
-from django.test import TestCase
+import csv
+import os
+import pstats
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from json import dumps, loads
+from tempfile import TemporaryDirectory
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from app.renderer import ApiRenderer
+from helpers.encoders import fast_json_dumps
+from helpers.metrics import registry
+from helpers.query_detector import QueryProblems
+from helpers.responses import AppResponse, CustomJsonResponse
+from user.enums import UserRole
+from user.models import Users, UserTasks
+from .models import TaskRollup, Tasks
+from .serializers import (
+    FastTaskListSerializer,
+    TaskDetailSerializer,
+    TaskLightSerializer,
+    TaskSerializer,
+)
+from .views import add_assignments
+
+
+class TaskAPITestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = Users.objects.create_user(
+            username="employer", password="password", role=UserRole.EMPLOYER.value
+        )
+        cls.employee = Users.objects.create_user(
+            username="employee", password="password", role=UserRole.EMPLOYEE.value
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer)
+
+    @staticmethod
+    def create_tasks(count, assignees=()):
+        now = timezone.now()
+        tasks = Tasks.objects.bulk_create(
+            Tasks(
+                title=f"Task {i}",
+                description=f"Description {i}",
+                status=1 + i % 2,
+                due_date=None if i % 5 == 0 else now + timedelta(days=i % 7),
+            )
+            for i in range(count)
+        )
+        UserTasks.objects.bulk_create(
+            UserTasks(user=user, task=task) for task in tasks for user in assignees
+        )
+        Tasks.objects.filter(id__in=[task.id for task in tasks]).refresh_assignees()
+        return tasks
+
+
+class KeysetPaginationTestCase(TaskAPITestCase):
+    def collect_pages(self, url, params):
+        ids, pages = [], []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            pages.append(page)
+            ids.extend(task["id"] for task in page["results"])
+            if not page["next"]:
+                return ids, pages
+            response = self.client.get(page["next"])
+
+    def test_pages_cover_all_tasks_once(self):
+        tasks = self.create_tasks(23)
+
+        for ordering in ["_created", "-_created", "due_date", "-due_date"]:
+            params = {"ordering": ordering, "page_size": 5}
+            ids, pages = self.collect_pages("/api/v1/tasks/", params)
+            self.assertEqual(len(pages), 5)
+            self.assertEqual(sorted(ids), sorted(task.id for task in tasks))
+
+    def test_due_date_order_sorts_nulls_as_largest(self):
+        self.create_tasks(12)
+
+        ids, _ = self.collect_pages("/api/v1/tasks/", {"ordering": "due_date", "page_size": 4})
+        due_dates = [Tasks.objects.get(id=task_id).due_date for task_id in ids]
+        dated = [due_date for due_date in due_dates if due_date is not None]
+        self.assertEqual(due_dates[: len(dated)], dated)
+        self.assertEqual(dated, sorted(dated))
+
+        ids, _ = self.collect_pages("/api/v1/tasks/", {"ordering": "-due_date", "page_size": 4})
+        due_dates = [Tasks.objects.get(id=task_id).due_date for task_id in ids]
+        self.assertEqual(due_dates[len(due_dates) - len(dated) :], sorted(dated, reverse=True))
+
+    def test_previous_link_returns_previous_page(self):
+        self.create_tasks(10)
+
+        _, pages = self.collect_pages("/api/v1/tasks/", {"ordering": "due_date", "page_size": 3})
+        self.assertIsNone(pages[0]["previous"])
+        for previous_page, page in zip(pages, pages[1:]):
+            response = self.client.get(page["previous"])
+            self.assertEqual(response.json()["results"], previous_page["results"])
+
+    def test_page_size_is_capped(self):
+        self.create_tasks(5)
+
+        with self.settings(TASK_MAX_PAGE_SIZE=2):
+            response = self.client.get("/api/v1/tasks/", {"page_size": 100})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/tasks/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_my_tasks_are_paginated(self):
+        self.create_tasks(4, assignees=[self.employee])
+        self.client.force_authenticate(self.employee)
+
+        ids, pages = self.collect_pages("/api/v1/my-tasks/", {"page_size": 3})
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(len(set(ids)), 4)
+
+
+class TaskQueryCountTestCase(TaskAPITestCase):
+    """Listing must cost a fixed number of queries, whatever the number of tasks or assignees."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.assignees = [
+            Users.objects.create_user(username=f"assignee-{i}", password="password")
+            for i in range(3)
+        ]
+
+    def assert_list_queries(self, url, params, num):
+        for count in (2, 20):
+            Tasks.objects.all().delete()
+            self.create_tasks(count, assignees=self.assignees)
+            with self.assertNumQueries(num):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            results = response.json()["results"]
+            self.assertEqual(len(results), count)
+            self.assertEqual(len({task["id"] for task in results}), count)
+
+    def test_employer_list(self):
+        self.assert_list_queries("/api/v1/tasks/", {}, 2)
+
+    def test_employer_list_filtered_by_assignee(self):
+        self.assert_list_queries("/api/v1/tasks/", {"assignee": self.assignees[0].id}, 2)
+
+    def test_employer_list_filtered_by_assignee_and_status(self):
+        Tasks.objects.all().delete()
+        self.create_tasks(10, assignees=self.assignees)
+        params = {"assignee": self.assignees[1].id, "status": 1, "ordering": "due_date"}
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/tasks/", params)
+        self.assertEqual(len(response.json()["results"]), 5)
+
+    def test_employer_list_serializes_assignees(self):
+        task = self.create_tasks(1, assignees=self.assignees)[0]
+        response = self.client.get(f"/api/v1/tasks/{task.id}/")
+        users = sorted(response.json()["users"], key=lambda item: item["user"]["id"])
+        self.assertEqual(
+            users,
+            [
+                {"user": {"id": user.id, "username": user.username, "role": user.role}}
+                for user in self.assignees
+            ],
+        )
+
+    def test_employer_retrieve(self):
+        task = self.create_tasks(1, assignees=self.assignees)[0]
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/v1/tasks/{task.id}/")
+
+    def test_my_tasks_list(self):
+        self.client.force_authenticate(self.assignees[0])
+        self.assert_list_queries("/api/v1/my-tasks/", {}, 1)
+
+
+class AsyncTaskViewsTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = self.create_tasks(7, assignees=[self.employee])
+        token = Token.objects.create(user=self.employer)
+        self.headers = {"Authorization": f"Token {token.key}"}
+
+    def get_async(self, path, params=None):
+        response = self.client.get(f"/api/v1/async/{path}", params, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return loads(response.content.decode().replace("/api/v1/async/", "/api/v1/"))
+
+    def test_list_matches_sync_view(self):
+        for params in [
+            {},
+            {"ordering": "due_date", "page_size": 3},
+            {"status": 1, "assignee": self.employee.id},
+        ]:
+            expected = self.client.get("/api/v1/tasks/", params).json()
+            self.assertEqual(self.get_async("tasks/", params), expected)
+
+            cursor_url = expected["next"] or expected["previous"]
+            if cursor_url:
+                expected = self.client.get(cursor_url).json()
+                self.assertEqual(self.get_async(cursor_url.split("/api/v1/")[1]), expected)
+
+    def test_list_queries(self):
+        self.get_async("tasks/")
+        # Page + assignees, the token is cached.
+        with self.assertNumQueries(2):
+            self.get_async("tasks/")
+
+    def test_retrieve_matches_sync_view(self):
+        task = self.tasks[0]
+        expected = self.client.get(f"/api/v1/tasks/{task.id}/").json()
+        self.assertEqual(self.get_async(f"tasks/{task.id}/"), expected)
+
+        response = self.client.get("/api/v1/async/tasks/0/", headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_assign_task(self):
+        task = self.tasks[1]
+        url = f"/api/v1/async/tasks/{task.id}/assign-task/"
+
+        for user_id in (self.employer.id, self.employer.id):
+            response = await self.async_client.post(
+                url, {"user": user_id}, content_type="application/json", headers=self.headers
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(await UserTasks.objects.filter(task=task).acount(), 2)
+
+        for user_id in (0, "²", True):
+            response = await self.async_client.post(
+                url, {"user": user_id}, content_type="application/json", headers=self.headers
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_employer_token(self):
+        response = self.client.get("/api/v1/async/tasks/")
+        self.assertEqual(response.status_code, 401)
+
+        token = Token.objects.create(user=self.employee)
+        headers = {"Authorization": f"Token {token.key}"}
+        response = self.client.get("/api/v1/async/tasks/", headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+
+class TaskBulkTestCase(TaskAPITestCase):
+    url = "/api/v1/tasks/bulk/"
+
+    def test_create(self):
+        items = [{"title": f"Task {i}", "status": 2} for i in range(5)] + [{"status": 9}]
+        response = self.client.post(self.url, {"create": items}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["data"]["create"]
+        self.assertEqual([result["success"] for result in results], [True] * 5 + [False])
+        self.assertEqual(set(results[-1]["errors"]), {"title", "status"})
+        tasks = Tasks.objects.filter(id__in=[result["id"] for result in results[:5]])
+        titles = sorted(tasks.values_list("title", flat=True))
+        self.assertEqual(titles, [item["title"] for item in items[:5]])
+        self.assertTrue(all(task._created and task._updated for task in tasks))
+
+    def test_update(self):
+        tasks = self.create_tasks(3)
+        items = [
+            {"id": tasks[0].id, "status": 2},
+            {"id": tasks[1].id, "title": "Renamed"},
+            {"id": tasks[2].id, "status": 9},
+            {"id": 0, "title": "Missing"},
+        ]
+        response = self.client.post(self.url, {"update": items}, format="json")
+
+        results = response.json()["data"]["update"]
+        self.assertEqual([result["success"] for result in results], [True, True, False, False])
+        tasks = Tasks.objects.in_bulk([task.id for task in tasks])
+        self.assertEqual(tasks[items[0]["id"]].status, 2)
+        self.assertEqual(tasks[items[1]["id"]].title, "Renamed")
+        self.assertEqual(tasks[items[2]["id"]].status, 1)
+
+    def test_delete(self):
+        tasks = self.create_tasks(3, assignees=[self.employee])
+        ids = [tasks[0].id, tasks[1].id, 0]
+        response = self.client.post(self.url, {"delete": ids}, format="json")
+
+        results = response.json()["data"]["delete"]
+        self.assertEqual([result["success"] for result in results], [True, True, False])
+        self.assertEqual(list(Tasks.objects.values_list("id", flat=True)), [tasks[2].id])
+        self.assertEqual(UserTasks.objects.count(), 1)
+
+    def test_boolean_ids_are_not_ids(self):
+        # true == 1 in Python, it must not select task 1.
+        Tasks.objects.create(id=1, title="Task 1")
+        data = {"update": [{"id": True, "title": "Renamed"}], "delete": [True]}
+        response = self.client.post(self.url, data, format="json")
+
+        results = response.json()["data"]
+        self.assertEqual([result["success"] for result in results["update"]], [False])
+        self.assertEqual([result["success"] for result in results["delete"]], [False])
+        self.assertEqual(Tasks.objects.get(id=1).title, "Task 1")
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        for count in (10, 100):
+            items = [{"title": f"Task {i}"} for i in range(count)]
+            with self.assertNumQueries(3):
+                self.client.post(self.url, {"create": items}, format="json")
+
+    def test_too_many_items(self):
+        with self.settings(TASK_BULK_MAX_ITEMS=2):
+            response = self.client.post(self.url, {"delete": [1, 2, 3]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskAssignmentTestCase(TaskAPITestCase):
+    url = "/api/v1/tasks/bulk-assign/"
+
+    def test_assign_task(self):
+        task = self.create_tasks(1)[0]
+        updated = task._updated
+        url = f"/api/v1/tasks/{task.id}/assign-task/"
+
+        for _ in range(2):
+            response = self.client.post(url, {"user": self.employee.id}, format="json")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserTasks.objects.filter(task=task, user=self.employee).count(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task._updated, updated)
+
+        response = self.client.post(url, {"user": 0}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_user_ids(self):
+        task = self.create_tasks(1)[0]
+        for action in ("assign-task", "unassign-task"):
+            url = f"/api/v1/tasks/{task.id}/{action}/"
+            for user_id in ("²", "١", True, -1, None):
+                response = self.client.post(url, {"user": user_id}, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["info"]["error_code"], 400004)
+
+        url = f"/api/v1/tasks/{task.id}/assign-task/"
+        response = self.client.post(url, {"user": str(self.employee.id)}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_assign(self):
+        tasks = self.create_tasks(2)
+        staff = [Users.objects.create_user(username=f"staff-{i}") for i in range(20)]
+        UserTasks.objects.create(task=tasks[0], user=staff[0])
+        items = [
+            {"task": tasks[0].id, "users": [user.id for user in staff]},
+            {"task": tasks[1].id, "user": self.employee.id},
+            {"task": tasks[1].id, "users": [staff[0].id, 0]},
+            {"task": 0, "user": self.employee.id},
+            {"task": tasks[1].id},
+        ]
+
+        # Tasks + users + insert + lock, read and update of the assignee columns + savepoint.
+        with self.assertNumQueries(8):
+            response = self.client.post(self.url, {"assignments": items}, format="json")
+
+        results = response.json()["data"]["assignments"]
+        self.assertEqual([r["success"] for r in results], [True, True, False, False, False])
+        self.assertEqual(UserTasks.objects.filter(task=tasks[0]).count(), 20)
+        self.assertEqual(
+            list(UserTasks.objects.filter(task=tasks[1]).values_list("user", flat=True)),
+            [self.employee.id],
+        )
+        tasks[0].refresh_from_db()
+        self.assertEqual(tasks[0].assignee_count, 20)
+        self.assertEqual(tasks[0].assignee_ids, sorted(user.id for user in staff))
+
+
+class TaskAssigneeColumnsTestCase(TaskAPITestCase):
+    def assert_assignees(self, task, users):
+        task.refresh_from_db()
+        self.assertEqual(task.assignee_ids, sorted(user.id for user in users))
+        self.assertEqual(task.assignee_count, len(users))
+
+    def test_assign_and_unassign(self):
+        task = self.create_tasks(1)[0]
+        for user in (self.employee, self.employer):
+            self.client.post(f"/api/v1/tasks/{task.id}/assign-task/", {"user": user.id})
+        self.assert_assignees(task, [self.employee, self.employer])
+
+        response = self.client.post(
+            f"/api/v1/tasks/{task.id}/unassign-task/", {"user": self.employee.id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_assignees(task, [self.employer])
+
+    def test_task_save_keeps_assignees(self):
+        task = self.create_tasks(1)[0]
+        UserTasks.objects.create(task=task, user=self.employee)
+
+        task.title = "Renamed"
+        task.save()
+        self.assert_assignees(task, [self.employee])
+
+        self.employee.delete()
+        self.assert_assignees(task, [])
+
+    def test_light_mode(self):
+        tasks = self.create_tasks(3, assignees=[self.employee, self.employer])
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/tasks/", {"mode": "light"})
+
+        result = response.json()["results"][0]
+        self.assertNotIn("users", result)
+        self.assertEqual(result["assignee_count"], 2)
+        self.assertEqual(result["assignee_ids"], sorted([self.employee.id, self.employer.id]))
+
+        response = self.client.get(f"/api/v1/tasks/{tasks[0].id}/", {"mode": "light"})
+        self.assertEqual(response.json()["assignee_count"], 2)
+
+    def test_rebuild_command(self):
+        tasks = self.create_tasks(3, assignees=[self.employee])
+        Tasks.objects.filter(id=tasks[0].id).update(assignee_count=0, assignee_ids=[])
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_assignees", "--check", stdout=StringIO())
+        call_command("rebuild_assignees", "--batch-size", "2", stdout=StringIO())
+        call_command("rebuild_assignees", "--check", stdout=StringIO())
+        self.assert_assignees(tasks[0], [self.employee])
+
+
+class SparseFieldsTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = self.create_tasks(5, assignees=[self.employee])
+
+    def test_fields_narrow_payload_and_query(self):
+        params = {"fields": "title,status", "ordering": "due_date", "page_size": 2}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/tasks/", params)
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+        page = response.json()
+        self.assertEqual([set(task) for task in page["results"]], [{"id", "title", "status"}] * 2)
+
+        next_page = self.client.get(page["next"]).json()
+        self.assertEqual(len(next_page["results"]), 2)
+
+    def test_expand_users(self):
+        params = {"fields": "title", "expand": "users"}
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/v1/tasks/{self.tasks[0].id}/", params)
+        task = response.json()
+        self.assertEqual(set(task), {"id", "title", "users"})
+        self.assertEqual(task["users"][0]["user"]["id"], self.employee.id)
+
+    def test_unknown_fields(self):
+        for params in [{"fields": "title,secret"}, {"fields": "title", "expand": "status"}]:
+            response = self.client.get("/api/v1/tasks/", params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_my_tasks_fields(self):
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/my-tasks/", {"fields": "status"})
+        self.assertEqual(set(response.json()["results"][0]), {"id", "status"})
+
+    def test_async_views_match(self):
+        token = Token.objects.create(user=self.employer)
+        headers = {"Authorization": f"Token {token.key}"}
+        for path, params in [
+            ("tasks/", {"fields": "title,due_date"}),
+            (f"tasks/{self.tasks[0].id}/", {"fields": "status", "expand": "users"}),
+        ]:
+            expected = self.client.get(f"/api/v1/{path}", params).json()
+            response = self.client.get(f"/api/v1/async/{path}", params, headers=headers)
+            self.assertEqual(loads(response.content.decode().replace("async/", "")), expected)
+
+
+class TaskFilterTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Statuses alternate 1, 2; due dates are None for i % 5 == 0, else now + i % 7 days.
+        self.tasks = self.create_tasks(10)
+        self.other = Users.objects.create_user(username="other", password="password")
+        add_assignments([UserTasks(user=self.employee, task=task) for task in self.tasks[:3]])
+        add_assignments([UserTasks(user=self.other, task=task) for task in self.tasks[2:5]])
+
+    def ids(self, params, url="/api/v1/tasks/"):
+        response = self.client.get(url, {"page_size": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return sorted(task["id"] for task in response.json()["results"])
+
+    def expected(self, **filters):
+        return sorted(Tasks.objects.filter(**filters).values_list("id", flat=True))
+
+    def test_multiple_values(self):
+        self.assertEqual(self.ids({"status": "1,2"}), self.expected())
+        self.assertEqual(self.ids({"status": "2"}), self.expected(status=2))
+        assigned = [task.id for task in self.tasks[:5]]
+        self.assertEqual(self.ids({"assignee": f"{self.employee.id},{self.other.id}"}), assigned)
+        params = {"assignee": self.other.id, "status": 1}
+        self.assertEqual(self.ids(params), self.expected(id__in=assigned[2:5:2]))
+
+    def test_ranges(self):
+        now = timezone.now()
+        params = {
+            "due_date_after": (now + timedelta(days=2)).isoformat(),
+            "due_date_before": (now + timedelta(days=4)).isoformat(),
+        }
+        expected = self.expected(
+            due_date__gte=now + timedelta(days=2), due_date__lte=now + timedelta(days=4)
+        )
+        self.assertEqual(self.ids(params), expected)
+        self.assertEqual(self.ids({"created_after": now.isoformat()}), [])
+        self.assertEqual(self.ids({"created_before": now.isoformat()}), self.expected())
+
+    def test_flags(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        # Task 2 is in progress, task 3 is completed.
+        Tasks.objects.filter(id__in=[self.tasks[2].id, self.tasks[3].id]).update(due_date=yesterday)
+        self.assertEqual(self.ids({"overdue": "true"}), [self.tasks[2].id])
+        not_overdue = sorted(set(self.expected()) - {self.tasks[2].id})
+        self.assertEqual(self.ids({"overdue": "false"}), not_overdue)
+        self.assertEqual(self.ids({"unassigned": "true"}), [task.id for task in self.tasks[5:]])
+        self.assertEqual(self.ids({"unassigned": "false"}), [task.id for task in self.tasks[:5]])
+
+    def test_my_tasks(self):
+        self.client.force_authenticate(self.employee)
+        ids = self.ids({"status": 1}, url="/api/v1/my-tasks/")
+        self.assertEqual(ids, [self.tasks[0].id, self.tasks[2].id])
+
+    def test_invalid_values(self):
+        cases = [
+            ({"status": "done"}, {"status": ["Enter a whole number."]}),
+            ({"assignee": "1,x"}, {"assignee": ["Enter a whole number."]}),
+            ({"due_date_after": "tomorrow"}, {"due_date": ["Enter a valid date/time."]}),
+        ]
+        for params, errors in cases:
+            response = self.client.get("/api/v1/tasks/", params)
+            self.assertEqual(response.status_code, 400)
+            body = response.json()
+            self.assertEqual(body["info"]["error_code"], 400008)
+            self.assertEqual(body["data"]["errors"], errors)
+
+
+class TaskStatsTestCase(TaskAPITestCase):
+    url = "/api/v1/tasks/stats/"
+
+    def setUp(self):
+        super().setUp()
+        # Statuses alternate 1, 2; tasks 0-3 are assigned to the employee, 2-3 to the employer.
+        self.tasks = self.create_tasks(6, assignees=[self.employee])
+        UserTasks.objects.filter(task__in=self.tasks[4:]).delete()
+        add_assignments([UserTasks(user=self.employer, task=task) for task in self.tasks[2:4]])
+        yesterday = timezone.now() - timedelta(days=1)
+        Tasks.objects.filter(id__in=[self.tasks[0].id, self.tasks[1].id]).update(due_date=yesterday)
+
+    def stats(self, params=None):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_counts(self):
+        with self.assertNumQueries(2):
+            stats = self.stats()
+        self.assertEqual(
+            stats,
+            {
+                "total": 6,
+                "overdue": 1,
+                "unassigned": 2,
+                "status": {"in_progress": 3, "completed": 3},
+                "assignees": [
+                    {"user": self.employer.id, "total": 2, "in_progress": 1, "completed": 1},
+                    {"user": self.employee.id, "total": 4, "in_progress": 2, "completed": 2},
+                ],
+            },
+        )
+
+    def test_filters(self):
+        stats = self.stats({"status": 2, "assignee": self.employer.id})
+        self.assertEqual(stats["status"], {"in_progress": 0, "completed": 1})
+        users = [row["user"] for row in stats["assignees"]]
+        self.assertEqual(users, [self.employer.id, self.employee.id])
+        self.assertEqual(self.stats({"q": "nothing"})["total"], 0)
+
+    @override_settings(TASK_STATS_ROLLUP=True)
+    def test_rollup_follows_writes(self):
+        TaskRollup.objects.rebuild()
+        expected = self.stats({"status": "1,2"})
+        with self.assertNumQueries(2):
+            self.assertEqual(self.stats(), expected)
+
+        task = self.client.post("/api/v1/tasks/", {"title": "New"}, format="json").json()
+        self.client.patch(f"/api/v1/tasks/{self.tasks[0].id}/", {"status": 2}, format="json")
+        self.client.post(f"/api/v1/tasks/{task['id']}/assign-task/", {"user": self.employee.id})
+        self.client.post(
+            f"/api/v1/tasks/{self.tasks[2].id}/unassign-task/", {"user": self.employer.id}
+        )
+        bulk = {
+            "create": [{"title": "Bulk", "status": 2}],
+            "update": [{"id": self.tasks[3].id, "status": 1}],
+            "delete": [self.tasks[5].id],
+        }
+        self.client.post("/api/v1/tasks/bulk/", bulk, format="json")
+        self.client.delete(f"/api/v1/tasks/{self.tasks[1].id}/")
+        self.employer.delete()
+
+        self.assertEqual(self.stats(), self.stats({"status": "1,2"}))
+        call_command("rebuild_task_rollup", "--check", stdout=StringIO())
+
+    @override_settings(TASK_STATS_ROLLUP=True)
+    def test_bulk_delete_updates_rollup_once(self):
+        TaskRollup.objects.rebuild()
+        ids = [task.id for task in self.tasks]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/v1/tasks/bulk/", {"delete": ids}, format="json")
+
+        upserts = [q for q in queries if q["sql"].startswith('INSERT INTO "task_rollup"')]
+        self.assertEqual(len(upserts), 1)
+        call_command("rebuild_task_rollup", "--check", stdout=StringIO())
+
+    def test_rebuild_command(self):
+        TaskRollup.objects.rebuild()
+        TaskRollup.objects.filter(user_id=self.employee.id).delete()
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_task_rollup", "--check", stdout=StringIO())
+        call_command("rebuild_task_rollup", stdout=StringIO())
+        call_command("rebuild_task_rollup", "--check", stdout=StringIO())
+
+
+class SeedTasksCommandTestCase(TestCase):
+    @override_settings(TASK_STATS_ROLLUP=True)
+    def test_seed(self):
+        options = {"employers": 2, "employees": 5, "tasks": 30, "fanout": 2, "batch_size": 7}
+        call_command("seed_tasks", stdout=StringIO(), **options)
+
+        self.assertEqual(Users.objects.filter(role=UserRole.EMPLOYER.value).count(), 2)
+        self.assertEqual(Users.objects.filter(role=UserRole.EMPLOYEE.value).count(), 5)
+        self.assertEqual(Tasks.objects.count(), 30)
+        self.assertEqual(UserTasks.objects.count(), 60)
+        call_command("rebuild_assignees", "--check", stdout=StringIO())
+        call_command("rebuild_task_rollup", "--check", stdout=StringIO())
+        self.assertTrue(Users.objects.get(username="bench-employee-0").check_password("password"))
+
+        with self.assertRaises(CommandError):
+            call_command("seed_tasks", stdout=StringIO(), **options)
+
+
+class TaskSearchTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(4, assignees=[self.employee])
+        Tasks.objects.bulk_create(
+            [
+                Tasks(title="Fix invoice export", description="The totals are wrong"),
+                Tasks(title="Write release notes", description="Mention the invoice fix"),
+                Tasks(title="Invoice reminders", description="Fix the email template"),
+            ]
+        )
+
+    def search(self, q, **params):
+        response = self.client.get("/api/v1/tasks/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_matches_every_word(self):
+        titles = [task["title"] for task in self.search("invoice fix")["results"]]
+        self.assertEqual(
+            sorted(titles), ["Fix invoice export", "Invoice reminders", "Write release notes"]
+        )
+        self.assertEqual(self.search("invoice nothing")["results"], [])
+
+    def test_ranks_title_matches_first(self):
+        titles = [task["title"] for task in self.search("invoice fix")["results"]]
+        self.assertEqual(titles[0], "Fix invoice export")
+        self.assertEqual(titles[-1], "Write release notes")
+
+        titles = [task["title"] for task in self.search("fix", ordering="_created")["results"]]
+        self.assertEqual(titles[0], "Fix invoice export")
+
+    def test_pages_cover_all_matches(self):
+        first = self.search("invoice", page_size=2)
+        second = self.client.get(first["next"]).json()
+        ids = [task["id"] for task in first["results"] + second["results"]]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertIsNone(second["next"])
+
+    def test_my_tasks_and_async_views(self):
+        token = Token.objects.create(user=self.employer)
+        response = self.client.get(
+            "/api/v1/async/tasks/", {"q": "fix"}, headers={"Authorization": f"Token {token.key}"}
+        )
+        self.assertEqual(loads(response.content.decode()), self.search("fix"))
+
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/my-tasks/", {"q": "task 2"})
+        self.assertEqual([task["title"] for task in response.json()["results"]], ["Task 2"])
+
+
+class FastTaskListSerializerTestCase(TaskAPITestCase):
+    def assert_same_output(self, serializer_class, fields=None):
+        queryset = Tasks.objects.order_by("id")
+        fast = FastTaskListSerializer(serializer_class, fields)
+        expected = serializer_class(
+            queryset.with_assignees(), many=True, context={"fields": fields}
+        ).data
+        self.assertEqual(
+            dumps(fast.to_representation(list(fast.values(queryset)))), dumps(expected)
+        )
+
+    def test_same_output_as_serializers(self):
+        users = [self.employee, self.employer]
+        self.create_tasks(6, assignees=users)
+        self.create_tasks(4)
+        UserTasks.objects.filter(user=self.employee).first().delete()
+
+        for tz in ["UTC", "Asia/Ho_Chi_Minh"]:
+            with timezone.override(tz):
+                self.assert_same_output(TaskDetailSerializer)
+                self.assert_same_output(TaskDetailSerializer, {"id", "due_date", "users"})
+                self.assert_same_output(TaskLightSerializer)
+
+    def test_assignees_are_read_in_one_query(self):
+        self.create_tasks(20, assignees=[self.employee, self.employer])
+        fast = FastTaskListSerializer()
+        rows = list(fast.values(Tasks.objects.all()))
+        with self.assertNumQueries(1):
+            fast.to_representation(rows)
+
+
+class TaskRenderingTestCase(TaskAPITestCase):
+    def test_api_renderer_matches_json_response(self):
+        tasks = self.create_tasks(3, assignees=[self.employee])
+        data = TaskDetailSerializer(Tasks.objects.with_assignees(), many=True).data
+        payloads = [
+            data,
+            data[0],
+            None,
+            "Done",
+            {"message": "Created", "data": data[0]},
+            {"due_date": tasks[1].due_date, "ids": {1, 2}, "amount": Decimal("1.50")},
+        ]
+
+        for payload in payloads:
+            expected = loads(CustomJsonResponse(payload).content)
+            self.assertEqual(loads(ApiRenderer().render(payload)), expected)
+            self.assertEqual(loads(AppResponse(payload).content), expected)
+            with mock.patch("helpers.encoders.orjson", None):
+                self.assertEqual(loads(ApiRenderer().render(payload)), expected)
+
+    def test_responses_are_rendered_with_fast_json_dumps(self):
+        self.create_tasks(3)
+        with mock.patch("helpers.responses.fast_json_dumps", wraps=fast_json_dumps) as dumps:
+            response = self.client.get("/api/v1/tasks/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dumps.call_count, 1)
+
+        with mock.patch("app.renderer.fast_json_dumps", wraps=fast_json_dumps) as dumps:
+            response = self.client.get("/api/v1/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dumps.call_count, 1)
+        self.assertEqual(len(response.json()["results"]), 3)
+
+
+class TaskExportTestCase(TaskAPITestCase):
+    url = "/api/v1/tasks/export/"
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        tasks = self.create_tasks(7, assignees=[self.employee])
+        with self.settings(TASK_EXPORT_CHUNK_SIZE=3):
+            content = self.read(self.client.get(self.url, {"status": 1}))
+
+        rows = [loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [t.id for t in tasks if t.status == 1])
+        self.assertEqual(rows[0]["assignees"], [self.employee.id])
+        self.assertEqual(rows[0]["title"], tasks[0].title)
+
+    def test_csv(self):
+        self.create_tasks(3, assignees=[self.employee])
+        self.create_tasks(2)
+        params = {"output": "csv", "assignee": self.employee.id, "ordering": "-_created"}
+        content = self.read(self.client.get(self.url, params))
+
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["assignees"], str(self.employee.id))
+
+    def test_invalid_output(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MY_TASKS_CACHE_ALIAS="default")
+class MyTasksCacheTestCase(TaskAPITestCase):
+    url = "/api/v1/my-tasks/"
+
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        self.tasks = self.create_tasks(3, assignees=[self.employee])
+        self.client.force_authenticate(self.employee)
+
+    def test_list_is_cached(self):
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_unchanged_poll_returns_304(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MY_TASKS_CACHE_ALIAS="")
+    def test_unchanged_poll_returns_304_without_cache(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.tasks[0].title = "Renamed"
+        self.tasks[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def assert_invalidated(self, change):
+        etag = self.client.get(self.url)["ETag"]
+        change()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        return response.json()["results"]
+
+    def test_task_save_invalidates(self):
+        def rename():
+            self.tasks[0].title = "Renamed"
+            self.tasks[0].save()
+
+        results = self.assert_invalidated(rename)
+        self.assertIn("Renamed", [task["title"] for task in results])
+
+    def test_task_delete_invalidates(self):
+        results = self.assert_invalidated(self.tasks[0].delete)
+        self.assertEqual(len(results), 2)
+
+    def test_assign_task_invalidates(self):
+        task = self.create_tasks(1)[0]
+        url = f"/api/v1/tasks/{task.id}/assign-task/"
+
+        def assign():
+            self.client.force_authenticate(self.employer)
+            self.client.post(url, {"user": self.employee.id}, format="json")
+            self.client.force_authenticate(self.employee)
+
+        results = self.assert_invalidated(assign)
+        self.assertEqual(len(results), 4)
+
+    def test_bulk_update_invalidates(self):
+        def update():
+            self.client.force_authenticate(self.employer)
+            items = [{"id": self.tasks[0].id, "title": "Bulk"}]
+            self.client.post("/api/v1/tasks/bulk/", {"update": items}, format="json")
+            self.client.force_authenticate(self.employee)
+
+        results = self.assert_invalidated(update)
+        self.assertIn("Bulk", [task["title"] for task in results])
+
+    def test_query_params_are_cached_separately(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, {"page_size": 1})
+        self.assertEqual(len(response.json()["results"]), 1)
+
+
+class RequestMetricsTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(3, assignees=[self.employee])
+        registry.reset()
+
+    def server_timing(self, response):
+        return {part.split(";")[0]: part for part in response["Server-Timing"].split(", ")}
+
+    def test_request_is_measured(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/tasks/", {"page_size": 2})
+
+        query_count = len(queries)
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {"total", "db", "serialize", "render"})
+        self.assertIn(f'desc="{query_count} queries"', timing["db"])
+
+        response = self.client.get(f"/api/v1/tasks/{Tasks.objects.first().id}/")
+        self.assertEqual(set(self.server_timing(response)), {"total", "db", "serialize", "render"})
+
+        series = registry.snapshot()
+        listed = series["EmployerTaskViewSet", "list", "GET", "200"]
+        self.assertEqual(listed["count"], 1)
+        self.assertEqual(listed["db_queries"], query_count)
+        self.assertGreater(listed["response_bytes"], 0)
+        self.assertEqual(series["EmployerTaskViewSet", "retrieve", "GET", "200"]["count"], 1)
+
+    def test_async_views_are_measured(self):
+        token = Token.objects.create(user=self.employer)
+        response = self.client.get(
+            "/api/v1/async/tasks/", headers={"Authorization": f"Token {token.key}"}
+        )
+        self.assertIn("render", self.server_timing(response))
+        self.assertEqual(registry.snapshot()["AsyncTaskListView", "get", "GET", "200"]["count"], 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/v1/tasks/stats/")
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+
+        with override_settings(METRICS_TOKEN="secret"):
+            response = self.client.get("/metrics/", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{view="EmployerTaskViewSet",action="stats",method="GET",'
+            'status="200"} 1\n',
+            response.content.decode(),
+        )
+
+
+class QueryDetectorTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(4, assignees=[self.employee])
+
+    def test_repeated_queries_raise(self):
+        to_representation = TaskSerializer.to_representation
+
+        def read_assignees(serializer, task):
+            list(task.users.all())  # One query per listed task.
+            return to_representation(serializer, task)
+
+        self.client.force_authenticate(self.employee)
+        with mock.patch.object(TaskSerializer, "to_representation", read_assignees):
+            with self.assertRaises(QueryProblems) as raised:
+                self.client.get("/api/v1/my-tasks/")
+
+        report = loads(str(raised.exception))
+        self.assertEqual((report["view"], report["action"]), ("UserTaskViewSet", "list"))
+        [repeated] = report["repeated"]
+        self.assertEqual(repeated["count"], 4)
+        self.assertIn('FROM "user_task"', repeated["sql"])
+
+    def test_budget(self):
+        self.assertEqual(self.client.get("/api/v1/tasks/").status_code, 200)
+
+        with override_settings(QUERY_BUDGETS={"EmployerTaskViewSet.list": 1}):
+            with self.assertRaises(QueryProblems) as raised:
+                self.client.get("/api/v1/tasks/")
+        self.assertEqual(loads(str(raised.exception))["over_budget"], {"queries": 2, "budget": 1})
+
+    @override_settings(QUERY_DETECTOR_MODE="log", QUERY_BUDGETS={"EmployerTaskViewSet.list": 1})
+    def test_log_mode_is_sampled(self):
+        with override_settings(QUERY_DETECTOR_SAMPLE_RATE=0):
+            with self.assertNoLogs("helpers.query_detector"):
+                self.assertEqual(self.client.get("/api/v1/tasks/").status_code, 200)
+
+        with override_settings(QUERY_DETECTOR_SAMPLE_RATE=1):
+            with self.assertLogs("helpers.query_detector", "WARNING") as logs:
+                self.assertEqual(self.client.get("/api/v1/tasks/").status_code, 200)
+        self.assertIn('"over_budget"', logs.output[0])
+
+    @override_settings(QUERY_DETECTOR_MODE="log", QUERY_DETECTOR_SLOW_MS=0)
+    def test_slow_queries_are_logged_without_sampling(self):
+        with override_settings(QUERY_DETECTOR_SAMPLE_RATE=0):
+            with self.assertLogs("helpers.query_detector", "WARNING") as logs:
+                self.client.get("/api/v1/tasks/")
+        self.assertIn('"slow"', logs.output[0])
+        self.assertNotIn('"over_budget"', logs.output[0])
+
+    @override_settings(QUERY_DETECTOR_SLOW_MS=0)
+    def test_slow_queries_are_only_logged_in_raise_mode(self):
+        with self.assertLogs("helpers.query_detector", "WARNING") as logs:
+            self.assertEqual(self.client.get("/api/v1/tasks/").status_code, 200)
+        self.assertIn('"slow"', logs.output[0])
+
+
+class ProfilingTestCase(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(3, assignees=[self.employee])
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_INTERVAL=0.001)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_requested_profile(self):
+        response = self.client.get("/api/v1/tasks/", headers={"X-Profile": "cprofile"})
+        self.assertEqual(response.status_code, 200)
+        name = response["X-Profile-Name"]
+        self.assertRegex(name, r"-EmployerTaskViewSet-list-.*\.prof$")
+        stats = pstats.Stats(os.path.join(self.directory, name)).stats
+        functions = {function for _, _, function in stats}
+        self.assertIn("dispatch", functions)
+
+        listed = self.client.get("/profiles/").json()["data"]["profiles"]
+        self.assertEqual([profile["name"] for profile in listed], [name])
+        download = self.client.get(f"/profiles/{name}")
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b"".join(download.streaming_content))
+        self.assertEqual(self.client.get("/profiles/missing.prof").status_code, 404)
+
+        response = self.client.get("/api/v1/tasks/", headers={"X-Profile": "sample"})
+        self.assertTrue(response["X-Profile-Name"].endswith(".txt"))
+
+    def test_profiles_are_for_employers(self):
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/v1/my-tasks/", headers={"X-Profile": "cprofile"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Name", response)
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(self.client.get("/profiles/").status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/profiles/").status_code, 403)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2)
+    def test_sampled_profiles_rotate(self):
+        self.client.force_authenticate(self.employee)
+        for _ in range(3):
+            response = self.client.get("/api/v1/my-tasks/")
+            self.assertNotIn("X-Profile-Name", response)
+
+        names = os.listdir(self.directory)
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all("-UserTaskViewSet-list-" in name for name in names))
@@ -1,8 +1,21 @@
+from django.urls import path
 from rest_framework import routers
 
+from .async_views import AsyncTaskAssignView, AsyncTaskDetailView, AsyncTaskListView
 from .views import EmployerTaskViewSet, UserTaskViewSet
 
 router = routers.DefaultRouter()
 
 router.register(r"v1/my-tasks", UserTaskViewSet)
 router.register(r"v1/tasks", EmployerTaskViewSet, basename="employer-task")
+
+# Async counterparts of the employer task list, retrieve and assign-task, for ASGI workers.
+async_urlpatterns = [
+    path("v1/async/tasks/", AsyncTaskListView.as_view(), name="async-task-list"),
+    path("v1/async/tasks/<int:pk>/", AsyncTaskDetailView.as_view(), name="async-task-detail"),
+    path(
+        "v1/async/tasks/<int:pk>/assign-task/",
+        AsyncTaskAssignView.as_view(),
+        name="async-task-assign",
+    ),
+]
@@ -1,17 +1,69 @@
+from functools import partial
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
 from helpers.exceptions import BadRequestException
+from helpers.filters import FilterBackend
+from helpers.functions import chunks, is_id, to_id
+from helpers.paginations import KeysetPagination
 from helpers.responses import AppResponse
+from helpers.views import SparseFieldsViewMixin
 from user.models import Users, UserTasks
 from user.permissions import EmployerPermission
-from .models import Tasks
-from .serializers import TaskDetailSerializer, TaskSerializer
+from .caches import bump_versions, get_cache, get_version
+from .exports import EXPORT_FORMATS, export_rows
+from .filters import TaskFilter
+from .models import TaskRollup, Tasks
+from .serializers import (
+    FastTaskListSerializer,
+    TaskAssignmentSerializer,
+    TaskDetailSerializer,
+    TaskLightSerializer,
+    TaskSerializer,
+)
+from .stats import count_tasks, read_rollup
+
+
+def add_assignments(assignments):
+    """Insert `UserTasks`, skipping existing ones, and refresh the tasks' assignee columns."""
+    with transaction.atomic():
+        UserTasks.objects.bulk_create(
+            assignments, ignore_conflicts=True, batch_size=settings.TASK_BULK_BATCH_SIZE
+        )
+        Tasks.objects.filter(id__in={link.task_id for link in assignments}).refresh_assignees()
+        bump_versions(link.user_id for link in assignments)
+
+
+class TaskSearchMixin:
+    """`?q=` full-text search with `TasksQuerySet.search`, ranked unless `?ordering=` is given."""
+
+    search_query_param = "q"
+
+    @property
+    def search_terms(self):
+        return self.request.GET.get(self.search_query_param, "").strip()
+
+    @property
+    def ordering(self):
+        """Default ordering of `OrderingFilter`, the pagination default applies when None."""
+        return "-rank" if self.search_terms else None
+
+    def search(self, queryset):
+        return queryset.search(self.search_terms) if self.search_terms else queryset
 
 
 class UserTaskViewSet(
+    TaskSearchMixin,
+    SparseFieldsViewMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -21,44 +73,268 @@ class UserTaskViewSet(
 
     queryset = Tasks.objects.all()
     serializer_class = TaskSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [FilterBackend, OrderingFilter]
+    filterset_class = TaskFilter
+    ordering_fields = ["_created", "due_date"]
+    query_budgets = {"list": 4, "retrieve": 4}
 
     def get_queryset(self):
-        return self.queryset.filter(users__user=self.request.user)
+        if getattr(self, "swagger_fake_view", False):
+            # Schema generation inspects the filters without a user.
+            return self.queryset.none()
+        query = self.search(self.queryset.assigned_to(self.request.user))
+        return self.only_requested_fields(query)
+
+    def list(self, request, *args, **kwargs):
+        """Answered with 304 when `If-None-Match` is current, and cached per user and query
+        when `MY_TASKS_CACHE_ALIAS` is set."""
+        cache = get_cache()
+        if cache is None:
+            response = super().list(request, *args, **kwargs)
+            response.add_post_render_callback(partial(set_content_etag, request))
+            return response
+
+        # The version changes with any task of the user, so it tags the list without a query.
+        version = get_version(request.user.id)
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        cache_key = f"my-tasks:{request.user.id}:{version}:{md5(params.encode()).hexdigest()}"
+        etag = quote_etag(md5(cache_key.encode()).hexdigest())
+        if etag_matches(request, etag):
+            return Response(status=304, headers={"ETag": etag})
 
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, settings.MY_TASKS_CACHE_TTL)
+        return Response(data, headers={"ETag": etag})
 
-class EmployerTaskViewSet(viewsets.ModelViewSet):
+
+def etag_matches(request, etag):
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in if_none_match or "*" in if_none_match
+
+
+def set_content_etag(request, response):
+    """Tag a rendered response with the md5 of its content, and replace it with a 304 when
+    `If-None-Match` is current. The list is still read and rendered, but not sent again."""
+    etag = quote_etag(md5(response.content).hexdigest())
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
+
+
+def get_user_id(data):
+    """The `user` id of an assign or unassign request body."""
+    user_id = to_id(data.get("user")) if isinstance(data, dict) else None
+    if user_id is None:
+        raise BadRequestException(400004, "User is required")
+    return user_id
+
+
+def is_light(request):
+    """`?mode=light` reads tasks with `TaskLightSerializer`, without loading the assignees."""
+    return request.method == "GET" and request.GET.get("mode") == "light"
+
+
+class EmployerTaskViewSet(TaskSearchMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Employer Task ViewSet"""
 
     queryset = Tasks.objects.all()
     serializer_class = TaskDetailSerializer
     permission_classes = [EmployerPermission]
-    filter_backends = [OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [FilterBackend, OrderingFilter]
+    filterset_class = TaskFilter
     ordering_fields = ["_created", "due_date"]
+    expandable_fields = ["users"]
+    # Most queries per action, see `helpers.query_detector`: those of the action plus two
+    # for session or token authentication. Bulk actions repeat their queries per batch.
+    query_budgets = {"list": 4, "retrieve": 4, "stats": 4, "create": 5}
+    query_repeats_allowed = ["bulk", "bulk_assign"]
 
     def get_queryset(self):
-        query = super().get_queryset().prefetch_related("users", "users__user")
+        query = self.search(super().get_queryset())
+        if not is_light(self.request) and self.is_requested("users"):
+            query = query.with_assignees()
+        return self.only_requested_fields(query)
+
+    def get_serializer_class(self):
+        return TaskLightSerializer if is_light(self.request) else super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        """Same output as the serializer, built from `values()` by `FastTaskListSerializer`."""
+        serializer = FastTaskListSerializer(self.get_serializer_class(), self.requested_fields)
+        queryset = self.filter_queryset(self.get_queryset())
+        extra = [*self.ordering_fields, "rank"] if self.search_terms else self.ordering_fields
+        page = self.paginate_queryset(serializer.values(queryset, *extra))
+        return self.get_paginated_response(serializer.to_representation(page))
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream every matching task as NDJSON (default) or CSV with `?output=csv`.
 
-        assignee = self.request.query_params.get("assignee")
-        if assignee:
-            query = query.filter(users__user=assignee)
+        Accepts the same filters, `q` and `ordering` as the list.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise BadRequestException(400005, f"output must be one of {sorted(EXPORT_FORMATS)}")
 
-        status = self.request.query_params.get("status")
-        if status:
-            query = query.filter(status=status)
+        content_type, stream = EXPORT_FORMATS[output]
+        rows = export_rows(self.filter_queryset(self.get_queryset()))
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="tasks.{output}"'
+        return response
 
-        return query
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """Task counts per status and per assignee, and the overdue and unassigned totals.
+
+        Accepts the same filters and `q` as the list. The counts of all tasks are read from
+        `TaskRollup` when `settings.TASK_STATS_ROLLUP` is set.
+        """
+        queryset = self.filter_queryset(self.search(Tasks.objects.all()))
+        if settings.TASK_STATS_ROLLUP and not queryset.query.has_filters():
+            return AppResponse(read_rollup())
+        return AppResponse(count_tasks(queryset))
 
     @action(detail=True, methods=["post"], url_path="assign-task")
     def assign_task(self, request, pk):
         task = self.get_object()
-        user_id = request.data.get("user")
-        user = Users.objects.filter(id=user_id).first()
-        if not user:
-            raise BadRequestException("User is required")
+        user_id = get_user_id(request.data)
+        if not Users.objects.filter(id=user_id).exists():
+            raise BadRequestException(400004, "User is required")
+
+        add_assignments([UserTasks(user_id=user_id, task_id=task.id)])
+        return AppResponse("Task assigned successfully")
+
+    @action(detail=True, methods=["post"], url_path="unassign-task")
+    def unassign_task(self, request, pk):
+        task = self.get_object()
+        user_id = get_user_id(request.data)
 
+        # `task.signals` refreshes the assignee columns and caches for every deleted row.
         with transaction.atomic():
-            user_task = UserTasks.objects.create(user=user, task=task)
-            task.users.add(user_task)
-            task.save()
+            UserTasks.objects.filter(task=task, user_id=user_id).delete()
+        return AppResponse("Task unassigned successfully")
 
-        return AppResponse("Task assigned successfully")
+    @action(detail=False, methods=["post"], url_path="bulk-assign")
+    def bulk_assign(self, request):
+        """Assign many users to many tasks in one call.
+
+        Body: `{"assignments": [{"task": id, "user": id} | {"task": id, "users": [id, ...]}, ...]}`.
+        Already assigned pairs are skipped and task rows are left untouched.
+        """
+        items = request.data.get("assignments") if isinstance(request.data, dict) else None
+        if not isinstance(items, list):
+            raise BadRequestException(400002, "assignments must be a list")
+
+        validated = []
+        for item in items:
+            serializer = TaskAssignmentSerializer(data=item)
+            serializer.is_valid()
+            validated.append((serializer.validated_data, serializer.errors))
+
+        pairs = sum(len(attrs.get("users", [])) for attrs, _ in validated)
+        if pairs > settings.TASK_BULK_MAX_ITEMS:
+            raise BadRequestException(
+                400003, f"At most {settings.TASK_BULK_MAX_ITEMS} items are allowed per request"
+            )
+
+        valid = [attrs for attrs, errors in validated if not errors]
+        task_ids = {attrs["task"] for attrs in valid}
+        user_ids = {user_id for attrs in valid for user_id in attrs["users"]}
+        existing_tasks = set(Tasks.objects.filter(id__in=task_ids).values_list("id", flat=True))
+        existing_users = set(Users.objects.filter(id__in=user_ids).values_list("id", flat=True))
+
+        results, links = [], []
+        for attrs, errors in validated:
+            if not errors:
+                errors = {}
+                if attrs["task"] not in existing_tasks:
+                    errors["task"] = ["Not found."]
+                missing = [user_id for user_id in attrs["users"] if user_id not in existing_users]
+                if missing:
+                    errors["users"] = [f"Not found: {missing}."]
+
+            if errors:
+                results.append({"success": False, **attrs, "errors": errors})
+            else:
+                results.append({"success": True, **attrs})
+                links.extend(UserTasks(task_id=attrs["task"], user_id=u) for u in attrs["users"])
+
+        add_assignments(links)
+        return AppResponse({"assignments": results})
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Create, update and delete many tasks in one call.
+
+        Body: `{"create": [task, ...], "update": [{"id": ..., ...}, ...], "delete": [id, ...]}`.
+        Every item is validated on its own and gets a result at the same position.
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        create = data.get("create", [])
+        update = data.get("update", [])
+        delete = data.get("delete", [])
+        if not all(isinstance(items, list) for items in (create, update, delete)):
+            raise BadRequestException(400002, "create, update and delete must be lists")
+        if len(create) + len(update) + len(delete) > settings.TASK_BULK_MAX_ITEMS:
+            raise BadRequestException(
+                400003, f"At most {settings.TASK_BULK_MAX_ITEMS} items are allowed per request"
+            )
+
+        return AppResponse(
+            {
+                "create": self.bulk_create_tasks(create),
+                "update": self.bulk_update_tasks(update),
+                "delete": self.bulk_delete_tasks(delete),
+            }
+        )
+
+    def bulk_create_tasks(self, items):
+        serializer = self.get_serializer(data=items, many=True)
+        validated = serializer.validate_items()
+        tasks = iter(serializer.create([attrs for attrs, errors in validated if errors is None]))
+
+        return [
+            {"success": True, "id": next(tasks).id}
+            if errors is None
+            else {"success": False, "errors": errors}
+            for _, errors in validated
+        ]
+
+    def bulk_update_tasks(self, items):
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        tasks = Tasks.objects.in_bulk([task_id for task_id in ids if is_id(task_id)])
+        serializer = self.get_serializer(data=items, many=True, partial=True)
+
+        results, instances, changes = [], [], []
+        for task_id, (attrs, errors) in zip(ids, serializer.validate_items()):
+            task = tasks.get(task_id) if is_id(task_id) else None
+            if task is None:
+                results.append({"success": False, "id": task_id, "errors": {"id": ["Not found."]}})
+            elif errors is not None:
+                results.append({"success": False, "id": task_id, "errors": errors})
+            else:
+                instances.append(task)
+                changes.append(attrs)
+                results.append({"success": True, "id": task_id})
+
+        serializer.update(instances, changes)
+        return results
+
+    def bulk_delete_tasks(self, ids):
+        valid_ids = [task_id for task_id in ids if is_id(task_id)]
+        existing = set(Tasks.objects.filter(id__in=valid_ids).values_list("id", flat=True))
+        for chunk in chunks(sorted(existing), settings.TASK_BULK_BATCH_SIZE):
+            with transaction.atomic(), TaskRollup.objects.batch():
+                Tasks.objects.filter(id__in=chunk).delete()
+
+        return [
+            {"success": True, "id": task_id}
+            if is_id(task_id) and task_id in existing
+            else {"success": False, "id": task_id, "errors": {"id": ["Not found."]}}
+            for task_id in ids
+        ]
@@ -0,0 +1,181 @@
+from functools import lru_cache, partial
+from hashlib import sha256
+from threading import Lock
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from helpers.caches import LRUCache
+
+# Fields of the user that are not cached; they are loaded from the database when read.
+UNCACHED_USER_FIELDS = {"password"}
+
+local_cache = LRUCache(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_LOCAL_TTL)
+# Bumped by every invalidation, so a lookup that read the database before one does not fill
+# the in-process cache after it.
+local_generation = 0
+local_lock = Lock()
+
+
+def get_shared_cache():
+    alias = settings.TOKEN_AUTH_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def get_token_id(key):
+    # Hash the token so raw credentials never end up in a cache.
+    return sha256(key.encode()).hexdigest()
+
+
+def get_version_key(token_id):
+    return f"auth-token-version:{token_id}"
+
+
+def get_cache_key(token_id, version):
+    return f"auth-token:{token_id}:{version}"
+
+
+@lru_cache(maxsize=None)
+def get_user_fields():
+    fields = get_user_model()._meta.concrete_fields
+    return [field.attname for field in fields if field.name not in UNCACHED_USER_FIELDS]
+
+
+def pack(user, token):
+    """The cache entry of a token lookup: primitives only, without the key or password."""
+    return tuple(getattr(user, name) for name in get_user_fields()), token.created
+
+
+def unpack(key, entry, token_model):
+    """New, unshared user and token instances built from a cache entry."""
+    values, created = entry
+    user_model = get_user_model()
+    user = user_model.from_db(router.db_for_read(user_model), get_user_fields(), values)
+    token = token_model.from_db(
+        router.db_for_read(token_model), ["key", "user_id", "created"], [key, user.pk, created]
+    )
+    token.user = user
+    return user, token
+
+
+def set_local(token_id, entry, generation):
+    with local_lock:
+        if generation == local_generation:
+            local_cache.set(token_id, entry)
+
+
+def _invalidate(token_ids):
+    global local_generation
+    with local_lock:
+        local_generation += 1
+        for token_id in token_ids:
+            local_cache.delete(token_id)
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        versions = {get_version_key(token_id): uuid4().hex for token_id in token_ids}
+        shared_cache.set_many(versions, settings.TOKEN_AUTH_CACHE_TTL)
+
+
+def invalidate_tokens(keys):
+    """Drop the cached lookups of the token `keys`.
+
+    Entries are stored under a version of the token that this changes, so a lookup that read
+    the database before the change stores its result under a version no longer read. The
+    versions change again once the transaction commits, for lookups of the old rows meanwhile.
+    """
+    token_ids = [get_token_id(key) for key in keys]
+    if token_ids:
+        _invalidate(token_ids)
+        transaction.on_commit(partial(_invalidate, token_ids))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication` that caches the token and user lookup.
+
+    Entries are kept in a bounded in-process LRU and, when `TOKEN_AUTH_CACHE_ALIAS` names a
+    Django cache, in that shared cache too. `user.signals` drops them when a token is deleted or
+    its user is saved; in-process entries of other workers expire after
+    `TOKEN_AUTH_CACHE_LOCAL_TTL` seconds. Entries hold the user's field values without the
+    password, and every hit builds new instances from them.
+    """
+
+    def authenticate_credentials(self, key):
+        token_id = get_token_id(key)
+        entry = local_cache.get(token_id)
+        if entry is not None:
+            return unpack(key, entry, self.get_model())
+
+        generation = local_generation
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            version_key = get_version_key(token_id)
+            version = shared_cache.get(version_key)
+            if version is None:
+                shared_cache.add(version_key, uuid4().hex, settings.TOKEN_AUTH_CACHE_TTL)
+                version = shared_cache.get(version_key, "")
+            entry = shared_cache.get(get_cache_key(token_id, version))
+            if entry is not None:
+                set_local(token_id, entry, generation)
+                return unpack(key, entry, self.get_model())
+
+        user, token = super().authenticate_credentials(key)
+        entry = pack(user, token)
+        set_local(token_id, entry, generation)
+        if shared_cache is not None:
+            cache_key = get_cache_key(token_id, version)
+            shared_cache.set(cache_key, entry, settings.TOKEN_AUTH_CACHE_TTL)
+        return user, token
+
+    async def aauthenticate(self, request):
+        """`authenticate` for plain Django async views, using the async cache and ORM APIs."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        token_id = get_token_id(key)
+        entry = local_cache.get(token_id)
+        if entry is not None:
+            return unpack(key, entry, self.get_model())
+
+        generation = local_generation
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            version_key = get_version_key(token_id)
+            version = await shared_cache.aget(version_key)
+            if version is None:
+                await shared_cache.aadd(version_key, uuid4().hex, settings.TOKEN_AUTH_CACHE_TTL)
+                version = await shared_cache.aget(version_key, "")
+            entry = await shared_cache.aget(get_cache_key(token_id, version))
+            if entry is not None:
+                set_local(token_id, entry, generation)
+                return unpack(key, entry, self.get_model())
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        entry = pack(token.user, token)
+        set_local(token_id, entry, generation)
+        if shared_cache is not None:
+            cache_key = get_cache_key(token_id, version)
+            await shared_cache.aset(cache_key, entry, settings.TOKEN_AUTH_CACHE_TTL)
+        return token.user, token
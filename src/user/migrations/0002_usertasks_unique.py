@@ -0,0 +1,45 @@
+# Generated by Django 4.2.14 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def remove_duplicate_user_tasks(apps, schema_editor):
+    """Keep the oldest link of every duplicated (user, task) pair, BATCH_SIZE pairs at a time."""
+    UserTasks = apps.get_model("user", "UserTasks")
+    duplicates = (
+        UserTasks.objects.values("user", "task")
+        .annotate(keep=models.Min("id"), count=models.Count("id"))
+        .filter(count__gt=1)
+        .order_by("keep")
+    )
+    last_kept = 0
+    while True:
+        batch = list(duplicates.filter(keep__gt=last_kept)[:BATCH_SIZE])
+        if not batch:
+            break
+        pairs = models.Q()
+        for duplicate in batch:
+            pairs |= models.Q(user=duplicate["user"], task=duplicate["task"])
+        UserTasks.objects.filter(pairs).exclude(
+            id__in=[duplicate["keep"] for duplicate in batch]
+        ).delete()
+        last_kept = batch[-1]["keep"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_user_tasks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="usertasks",
+            constraint=models.UniqueConstraint(
+                fields=("user", "task"), name="user_task_unique"
+            ),
+        ),
+    ]
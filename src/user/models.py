@@ -25,3 +25,6 @@ class UserTasks(TrackingModel):
     class Meta:
         managed = True
         db_table = "user_task"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "task"], name="user_task_unique"),
+        ]
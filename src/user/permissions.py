@@ -8,3 +8,17 @@ class EmployerPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         return request.user.role == UserRole.EMPLOYER.value
+
+    async def ahas_permission(self, request, view):
+        """`has_permission` for async views; the role is read from the loaded user."""
+        return self.has_permission(request, view)
+
+
+class ProfilingPermission(permissions.BasePermission):
+    """Superusers and employers may profile requests, see `helpers.profiling`."""
+
+    message = "You must be an employer or a superuser to profile requests."
+
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_superuser or getattr(user, "role", None) == UserRole.EMPLOYER.value
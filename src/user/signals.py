@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .models import Users
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=Users)
+def invalidate_cached_user_tokens(sender, instance, created, **kwargs):
+    # Any saved field may change the outcome of authentication (role, is_active, ...).
+    if created:
+        return
+    invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
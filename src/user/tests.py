@@ -1,3 +1,128 @@
+import pickle
+from unittest import mock
+
+from django.core.cache import caches
 from django.test import TestCase
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from user.authentication import CachedTokenAuthentication, local_cache
+from user.enums import UserRole
+from user.models import Users
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        local_cache.clear()
+        caches["default"].clear()
+        self.user = Users.objects.create_user(
+            username="employer", password="password", role=UserRole.EMPLOYER.value
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def test_lookup_is_cached(self):
+        with self.assertNumQueries(1):
+            user, token = self.authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            cached = self.authentication.authenticate_credentials(self.token.key)
+
+        cached_user, cached_token = cached
+        self.assertEqual((cached_user, cached_token), (user, token))
+        self.assertIsNot(cached_user, user)
+
+    def test_shared_cache(self):
+        with self.settings(TOKEN_AUTH_CACHE_ALIAS="default"):
+            self.authentication.authenticate_credentials(self.token.key)
+            local_cache.clear()
+            with self.assertNumQueries(0):
+                user, _ = self.authentication.authenticate_credentials(self.token.key)
+            self.assertEqual(user, self.user)
+            self.assertEqual(user.role, self.user.role)
+
+            key = self.token.key
+            self.token.delete()
+            local_cache.clear()
+            with self.assertRaises(AuthenticationFailed):
+                self.authentication.authenticate_credentials(key)
+
+    def test_credentials_are_not_cached(self):
+        with self.settings(TOKEN_AUTH_CACHE_ALIAS="default"):
+            user, _ = self.authentication.authenticate_credentials(self.token.key)
+            local_cache.clear()
+            user, _ = self.authentication.authenticate_credentials(self.token.key)
+
+        stored = b"".join(caches["default"]._cache.values())
+        self.assertNotIn(self.token.key.encode(), stored)
+        self.assertNotIn(self.user.password.encode(), stored)
+        self.assertNotIn(self.token.key.encode(), pickle.dumps(list(local_cache._data.items())))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.password, self.user.password)
+
+    def test_lookup_before_invalidation_is_not_cached(self):
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def lookup_then_change_user(authentication, key):
+            result = lookup(authentication, key)
+            self.user.role = UserRole.EMPLOYEE.value
+            self.user.save()
+            return result
+
+        with self.settings(TOKEN_AUTH_CACHE_ALIAS="default"):
+            with mock.patch.object(
+                TokenAuthentication, "authenticate_credentials", lookup_then_change_user
+            ):
+                self.authentication.authenticate_credentials(self.token.key)
+            user, _ = self.authentication.authenticate_credentials(self.token.key)
+            self.assertEqual(user.role, UserRole.EMPLOYEE.value)
+
+            local_cache.clear()
+            user, _ = self.authentication.authenticate_credentials(self.token.key)
+            self.assertEqual(user.role, UserRole.EMPLOYEE.value)
+
+    def test_token_delete_invalidates(self):
+        key = self.token.key
+        self.authentication.authenticate_credentials(key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+    def test_user_change_invalidates(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        self.user.role = UserRole.EMPLOYEE.value
+        self.user.save()
+
+        user, _ = self.authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.role, UserRole.EMPLOYEE.value)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.token.key)
+
+    def test_token_authenticated_request(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.assertEqual(client.get("/api/v1/tasks/").status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get("/api/v1/tasks/").status_code, 200)
+
+
+class LoginAPITestCase(TestCase):
+    def setUp(self):
+        Users.objects.create_user(username="employee", password="password")
+
+    def test_login(self):
+        client = APIClient()
+        credentials = {"username": "employee", "password": "password", "remember_me": False}
+        response = client.post("/api/v1/login/", credentials, format="json")
+        self.assertEqual(response.status_code, 201)
+        token = response.json()["data"]["token"]
+        self.assertEqual(Token.objects.get(user__username="employee").key, token)
 
-# Create your tests here.
+        credentials["password"] = "wrong"
+        self.assertEqual(client.post("/api/v1/login/", credentials, format="json").status_code, 401)
@@ -25,7 +25,6 @@ class LoginAPIView(views.APIView):
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            print("serializer", serializer, serializer.data["username"])
             user = authenticate(
                 username=serializer.data["username"], password=serializer.data["password"]
             )